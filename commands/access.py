@@ -9,6 +9,8 @@ class CmdAccess(MuxCommand):
       access      -  Display your account and character access level.
       hierarchy   -  Displays the system's permission groups hierarchy.
       levels      -  Alias for hierarchy.
+    Switches:
+    /cache  (Helpstaff) Lock check cache hit rate and time saved.
     """
     key = 'access'
     aliases = ['hierarchy', 'levels']
@@ -22,7 +24,10 @@ class CmdAccess(MuxCommand):
         account = self.account
         hierarchy_full = settings.PERMISSION_HIERARCHY
         info = []  # List of info to output to user
-        if 'hierarchy' in self.cmdstring or 'levels' in self.cmdstring:
+        if 'cache' in self.switches and account.check_permstring('helpstaff'):
+            from world.access import ACCESS
+            info.append(ACCESS.report())
+        elif 'hierarchy' in self.cmdstring or 'levels' in self.cmdstring:
             info.append('|wPermission Hierarchy|n (climbing): %s|/' % ", ".join(hierarchy_full))
         else:
             pperms = ', '.join(account.permissions.all())
@@ -6,10 +6,15 @@ Commands describe the input the account can do to the world.
 
 """
 import time  # Check time since last activity
+from functools import partial
 from evennia.utils import inherits_from
 from evennia import default_cmds
 from evennia import Command as BaseCommand
 from evennia.commands.default.muxcommand import MuxCommand, MuxAccountCommand
+from world.occupancy import OCCUPANCY  # Command activity per location
+from world.presence import PRESENCE  # Latest command time per session
+from world.render import RENDER  # Display names worked out once per command
+from world.access import ACCESS  # Lock check results kept per command
 
 
 class Command(BaseCommand):
@@ -127,6 +132,19 @@ class MuxCommand(default_cmds.MuxCommand):
             self.account.execute_cmd(('help ' + self.cmdstring).lower())
             return True
         self.command_time = time.time()
+        if 'func' not in self.__dict__:  # Run func in the command's render and access scopes
+            self.func = partial(self.run_scoped, self.func)
+
+    @staticmethod
+    def run_scoped(func):
+        """Call func with display names and lock check results kept, ending both scopes however it returns."""
+        RENDER.begin()
+        ACCESS.begin()
+        try:
+            return func()
+        finally:
+            ACCESS.end()
+            RENDER.end()
 
     def parse(self):
         """
@@ -154,7 +172,11 @@ class MuxCommand(default_cmds.MuxCommand):
         here = char.location if char else None
         who = account.key if account else (char if char else '-visitor-')
         cmd = self.cmdstring if self.cmdstring != '__nomatch_command' else ''
+        if self.session:
+            PRESENCE.command(self.session)
         if here:
+            if char.has_account:
+                OCCUPANCY.command(here, char)
             if char.db.settings and 'broadcast commands' in char.db.settings and \
                             char.db.settings['broadcast commands'] is True:
                 for each in here.contents:
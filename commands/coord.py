@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from commands.command import MuxCommand
+from django.db import transaction
+from evennia.objects.models import ObjectDB
+from evennia.utils.utils import inherits_from
+from world.spatial import SPATIAL_INDEX, LEGACY_CATEGORIES
+
+
+class CmdCoord(MuxCommand):
+    """
+    Show or set room coordinates.
+    Usage:
+      @coord [room]               shows coordinates of here or a room.
+      @coord [room] = x, y, z     sets coordinates of here or a room.
+    Switches:
+    /migrate [batch size]  Move all rooms from coordx/coordy/coordz tags to
+                           the packed coordinate tag, one transaction per batch.
+    /index                 Rebuild the in-memory spatial index.
+    """
+    key = '@coord'
+    aliases = ['@coords']
+    locks = 'cmd:perm(builder)'
+    help_category = 'Building'
+    account_caller = True
+    BATCH_SIZE = 500
+
+    def func(self):
+        """Shows, sets, or migrates room coordinates."""
+        char = self.character
+        here = char.location
+        account = self.account
+        cmd = self.cmdstring
+        opt = self.switches
+        lhs, rhs = self.lhs, self.rhs
+        opt_list = [u'migrate', u'index']
+
+        if not all(x in opt_list for x in opt):
+            self.msg("Not a valid switch for |y%s|n. Use only these: |g/%s" % (cmd, "|n, |g/".join(opt_list)))
+            return
+        if 'migrate' in opt:
+            if not account.check_permstring('wizard'):
+                self.msg("You must have |wWizard|n or higher access to migrate coordinates.")
+                return
+            batch = int(self.args) if self.args.strip().isdigit() else self.BATCH_SIZE
+            self.migrate(max(batch, 1))
+            return
+        if 'index' in opt:
+            self.msg("|gSpatial index rebuilt|n with |w%i|n rooms." % SPATIAL_INDEX.rebuild())
+            return
+        room = char.search(lhs, global_search=True) if lhs else here
+        if not room:
+            return
+        if not inherits_from(room, 'typeclasses.rooms.Room'):
+            self.msg("%s is not a room." % room.get_display_name(char))
+            return
+        if rhs:
+            if not room.access(char, 'edit'):
+                self.msg("You have no permission to edit %s." % room.get_display_name(char))
+                return
+            try:
+                coord = tuple(int(each) for each in rhs.split(','))
+            except ValueError:
+                coord = ()
+            if len(coord) != 3:
+                self.msg("Usage: |g%s [room] = x, y, z" % cmd)
+                return
+            room.coord = coord
+            self.msg("|gCoordinates of|n %s set to |w%r|n." % (room.get_display_name(char), coord))
+            return
+        coord = room.coord
+        if coord:
+            self.msg("Coordinates of %s: |w%r|n" % (room.get_display_name(char), coord))
+        else:
+            self.msg("%s has no coordinates." % room.get_display_name(char))
+
+    def migrate(self, batch):
+        """Rewrite legacy coordinate tags as packed tags, batch rooms at a time."""
+        ids = list(ObjectDB.objects.filter(db_tags__db_category=LEGACY_CATEGORIES[0])
+                   .distinct().values_list('id', flat=True))
+        if not ids:
+            self.msg("No rooms have unpacked coordinates to migrate.")
+            return
+        moved, skipped = 0, 0
+        for start in range(0, len(ids), batch):
+            with transaction.atomic():
+                for room in ObjectDB.objects.filter(id__in=ids[start:start + batch]):
+                    if not inherits_from(room, 'typeclasses.rooms.Room') or not room.coord:
+                        skipped += 1
+                        continue
+                    room.coord = room.coord  # Reading falls back to the old tags, writing packs them.
+                    moved += 1
+            self.msg("Migrated |w%i|n of |w%i|n rooms." % (moved, len(ids)))
+        self.msg("|gCoordinate migration done|n: |w%i|n rooms packed, |w%i|n skipped." % (moved, skipped))
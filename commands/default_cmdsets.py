@@ -71,10 +71,13 @@ from commands.quit import CmdQuit
 from commands.verb import CmdTry
 from commands.zeit import CmdTime
 from commands.zone import CmdZone
+from commands.coord import CmdCoord
+from commands.mapimport import CmdMapImport
 from commands.about import CmdAbout
 from commands.mydie import CmdRoll
 from commands.staff import CmdWall
 from commands.staff import CmdAudit
+from commands.staff import CmdMass
 from commands.sense import CmdSense
 from commands.change import CmdChange
 from commands.portal import CmdPortal
@@ -163,6 +166,8 @@ class CharacterCmdSet(default_cmds.CharacterCmdSet):
         self.add(CmdTry)
         self.add(CmdDesc)
         self.add(CmdFlag)
+        self.add(CmdCoord)
+        self.add(CmdMapImport)
         self.add(CmdGive)
         self.add(CmdHome)
         self.add(CmdPage)
@@ -221,6 +226,7 @@ class AccountCmdSet(default_cmds.AccountCmdSet):
         self.add(CmdTime)
         self.add(CmdAbout)
         self.add(CmdAudit)
+        self.add(CmdMass)
         self.add(CmdSense)
         self.add(CmdAccess)
         self.add(CmdChange)
@@ -3,9 +3,9 @@ from commands.command import MuxCommand
 from evennia.utils import search
 from evennia.utils import create
 from django.conf import settings
-from django.db.models import Q
-from evennia.objects.models import ObjectDB
-from evennia.utils.utils import inherits_from, class_from_module
+from evennia.utils.utils import class_from_module
+from world.exitgraph import EXIT_GRAPH
+from world.roomnames import ROOM_NAMES
 
 
 class CmdExit(MuxCommand):
@@ -91,18 +91,7 @@ class CmdExit(MuxCommand):
 
         def find_by_name(search):
             search = search.strip().split(';', 1)[0]
-            keyquery = Q(db_key__istartswith=search)
-            aliasquery = Q(db_tags__db_key__istartswith=search,
-                           db_tags__db_tagtype__iexact='alias')
-
-            results = ObjectDB.objects.filter(keyquery | aliasquery).distinct()
-            nresults = results.count()
-
-            if nresults:  # convert multiple results to typeclasses.
-                results = [result for result in results]
-                room_typeclass = settings.BASE_ROOM_TYPECLASS  # Narrow results to only room types.
-                results = [obj for obj in results if inherits_from(obj, room_typeclass)]
-            return results
+            return ROOM_NAMES.find(search)
 
         def add(you_add, loc_add, ways_add):
             """"Command for adding an exit - checks location and permissions."""
@@ -121,6 +110,7 @@ class CmdExit(MuxCommand):
                 if loc_add.access(you_add, 'edit'):
                     if ways_add[direction].access(you_add, 'control'):
                         loc_add.db.exits = ways_add
+                        EXIT_GRAPH.invalidate(loc_add)
                         you_add.msg("|gAdded|n exit |lc%s|lt|530%s|n|le from %s to %s." %
                                     (self.key, self.key, loc_add.get_display_name(account),
                                      ways_add[direction].get_display_name(account)))
@@ -153,6 +143,7 @@ class CmdExit(MuxCommand):
                 tun_ways[back_dir(dir_tun)] = loc_tun
                 if dest_tun.access(you_tun, 'control'):
                     dest_tun.db.exits = tun_ways
+                    EXIT_GRAPH.invalidate(dest_tun)
                     you_tun.msg("|gAdded|n exit |530%s|n back from %s to %s." %
                                 (long_dir(back_dir(dir_tun)), dest_tun.get_display_name(account),
                                  loc_tun.get_display_name(account)))
@@ -196,11 +187,13 @@ class CmdExit(MuxCommand):
                     if loc.access(you, 'edit'):
                         del(ways[direction])
                         loc.db.exits = ways
+                        EXIT_GRAPH.invalidate(loc)
                         you.msg("|rRemoved|n exit |530%s|n from %s." % (self.key, loc.get_display_name(account)))
                     if ('tun' in switches or 'none' in switches) and tunnel_ways:
                         if dest.access(you, 'edit'):
                             del(tunnel_ways[tunnel_way])
                             dest.db.exits = tunnel_ways
+                            EXIT_GRAPH.invalidate(dest)
                             you.msg("|rRemoved|n exit |530%s|n from %s." %
                                     (long_dir(tunnel_way), dest.get_display_name(account)))
                         else:
@@ -230,6 +223,7 @@ class CmdExit(MuxCommand):
                 elif 'del' in switches or 'none' in switches:
                     if direction in ways:
                         del(ways[direction])
+                        EXIT_GRAPH.invalidate(loc)
                         you.msg("Exit |530%s|n was not valid. (|rremoved|n)" % self.key)
                     else:
                         you.msg("Exit |530%s|n does not exist here." % self.key)
@@ -270,6 +264,7 @@ class CmdExit(MuxCommand):
                 if not switches:
                     if direction in ways:
                         del(ways[direction])
+                        EXIT_GRAPH.invalidate(loc)
                         you.msg("Exit |530%s|n was not valid. (|rremoved|n)" % self.key)
                     else:
                         you.msg("You cannot travel %s." % self.key)
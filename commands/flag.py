@@ -36,7 +36,8 @@ class CmdFlag(MuxCommand):
              'diet': 'room has food available. You can not starve here.',
              'poll': 'a room or object that polls characters.',
              'contain': 'an object that acts as a container.',
-             'stealth': 'room does not announce when someone enters or leaves.'}
+             'stealth': 'room does not announce when someone enters or leaves.',
+             'minimap': 'a grid room that shows a map of the cells around you when you look.'}
 
 #     myscript.tags.add("weather", category="climate")
 
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import os
+from commands.command import MuxCommand
+from django.conf import settings
+from world.trizbort import BATCH_SIZE, SCALE, import_map
+
+MAP_DIR = os.path.join(settings.GAME_DIR, 'world', 'buildmaps')
+
+
+class CmdMapImport(MuxCommand):
+    """
+    Build rooms and exits from a Trizbort map in world/buildmaps.
+    Usage:
+      @mapimport                       lists the maps available.
+      @mapimport <map>[ = batch[, scale]]  imports the map.
+    Each room is tagged with coordinates from its map position, an area
+    named after the map, and a zone from its Trizbort region. Rooms and
+    exits are created in batches of 200 by default, and map positions are
+    divided by a scale of 32 map units per coordinate step.
+    """
+    key = '@mapimport'
+    locks = 'cmd:perm(mapimport) or perm(wizard)'
+    help_category = 'Building'
+    account_caller = True
+
+    def func(self):
+        """Streams the named map into the world."""
+        maps = sorted(os.path.splitext(name)[0] for name in os.listdir(MAP_DIR) if name.endswith('.trizbort'))
+        name = self.lhs.strip() if self.lhs else ''
+        if not name:
+            self.msg("Maps to import: |c%s" % "|n, |c".join(maps))
+            return
+        if name not in maps:
+            self.msg("No map named |r%s|n. Maps to import: |c%s" % (name, "|n, |c".join(maps)))
+            return
+        try:
+            options = [int(each) for each in self.rhslist] if self.rhs else []
+        except ValueError:
+            self.msg("Usage: |g%s <map>[ = batch[, scale]]" % self.cmdstring)
+            return
+        batch = options[0] if options else BATCH_SIZE
+        scale = options[1] if len(options) > 1 else SCALE
+        self.msg("|yImporting|n map |c%s|n ..." % name)
+        rooms, simple, objects = import_map(os.path.join(MAP_DIR, name + '.trizbort'),
+                                            max(batch, 1), max(scale, 1), report=self.msg)
+        self.msg("|gImported|n map |c%s|n: |w%i|n rooms, |w%i|n simple exits, |w%i|n exit objects."
+                 % (name, rooms, simple, objects))
@@ -1,6 +1,8 @@
 from evennia import default_cmds
 from evennia import CmdSet
-from evennia.utils.utils import inherits_from
+from world.exitgraph import SIMPLE_DIRECTIONS
+from world.pathfind import Route, find_path, room_of
+from world.routing import ROUTES
 
 
 class CmdSetBot(CmdSet):
@@ -16,10 +18,10 @@ class CmdPathfind(default_cmds.MuxCommand):
     key = 'seek'
     locks = 'cmd:all()'
 
-    maxdepth, maxrooms = 12, 150  # Adjustable range limits.
+    maxdepth, maxrooms = 24, 2000  # Adjustable range limits: longest route, most rooms searched.
 
     def func(self):
-        """confirms the target and initiates the search"""
+        """confirms the target and finds the shortest route to it"""
         # save the target object onto the command
         # this will use Evennia's default multimatch handling if more than one object matches
         loc = self.caller.location
@@ -34,55 +36,26 @@ class CmdPathfind(default_cmds.MuxCommand):
             loc.msg_contents("{it} can't find \"%s\"." % self.args, mapping=dict(it=self.obj))
             return
         target = self.target.get_display_name(self.caller)
-        # initialize a list to store rooms we've visited
-        self.visited = []
-        # Start search at depth=0
-        if not self._searcher(self.caller.location, 0):  # give 'not found' message
+        start, goal = room_of(self.caller), room_of(self.target)
+        steps = ROUTES.route(start, goal, self.maxdepth) if goal else None  # Tables first, then search.
+        route = Route(True, steps) if steps is not None else \
+            find_path(start, goal, budget=self.maxrooms, max_steps=self.maxdepth) if goal else Route()
+        if not route.found:  # give 'not found' message
             loc.msg_contents("%s can't find %s in range." % (this, target))
-
-    def _searcher(self, room, depth):
-        """Searches surrounding rooms recursively for an object"""
-        if not room or len(self.visited) >= self.maxrooms:  # Stop search if the search has ...
-            return False  # ... visited too many rooms or has come across a bad room.
-        loc = self.caller.location
-        this = self.obj.get_display_name(self.caller)
-        target = self.target.get_display_name(self.caller)
-        # first, record searching here
-        self.visited.append(room)
-        # End search either when the item is found...
-        if self.target in ([room] + room.contents + sum([each.contents for each in room.contents], [])):
-            if depth == 0:
-                here = loc.get_display_name(self.caller)
-                loc.msg_contents("{} finds {} right here in {}!".format(this, target, here))
-            else:
-                way = self.direction.get_display_name(self.caller, mxp=self.direction.key)
-                plural = 's' if depth != 1 else ''
-                if inherits_from(self.direction, 'typeclasses.rooms.Room'):
-                    dir_convert = {'n': 'north', 's': 'south', 'e': 'east', 'w': 'west',
-                                   'nw': 'northwest', 'se': 'southeast',
-                                   'ne': 'northeast', 'sw': 'southwest', 'u': 'up', 'd': 'down'}
-                    directions = {k: v for k, v in loc.db.exits.items() if v == self.direction}
-                    way = '|lc{0}|lt|530{1}|n|le'.format(directions.keys()[0], dir_convert[directions.keys()[0]])
-                loc.msg_contents("{} detects {} {} step{} away. Go {}".format(this, target, depth, plural, way))
-                print('Depth and Number of rooms searched: ', depth, len(self.visited))
-            return True
-        # or searched to `maxdepth` distance
-        if depth >= self.maxdepth:
-            return False
-        # Target not in the current room, scan through the exits and check them,
-        # skipping rooms we've already visited
-        exits = [exit for exit in room.exits if exit.destination not in self.visited]
-        orange_destinations = [room.db.exits[exit] for exit in room.db.exits.keys()
-                               if room.db.exits[exit] not in self.visited] if room.db.exits else []
-        for next in exits:
-            if depth == 0:  # we only want to return the exit out of the current room
-                self.direction = next
-            if self._searcher(next.destination, depth + 1):  # if we found the object, stop searching
-                return True
-        for next in orange_destinations:
-            if depth == 0:  # we only want to return the orange exit out of the current room
-                self.direction = next
-            if self._searcher(next, depth + 1):  # if we found the object, stop searching
-                return True
-        # Check all the exits, no result
-        return False
+            return
+        if not route.steps:
+            here = loc.get_display_name(self.caller)
+            loc.msg_contents("{} finds {} right here in {}!".format(this, target, here))
+            return
+        depth = len(route)
+        plural = 's' if depth != 1 else ''
+        way = self.way_name(route.first()[0])
+        loc.msg_contents("{} detects {} {} step{} away. Go {}".format(this, target, depth, plural, way))
+        if depth > 1:
+            self.caller.msg("Route: %s" % ", ".join(self.way_name(step[0]) for step in route.steps))
+
+    def way_name(self, way):
+        """Display a way out: an Exit object, or a simple exit direction."""
+        if isinstance(way, basestring):
+            return '|lc{0}|lt|530{1}|n|le'.format(way, SIMPLE_DIRECTIONS.get(way, way))
+        return way.get_display_name(self.caller, mxp=way.key)
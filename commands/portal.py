@@ -2,7 +2,7 @@
 import evennia
 from evennia.utils.utils import delay
 from commands.command import MuxCommand
-from evennia.server.sessionhandler import SESSIONS
+from world.presence import PRESENCE
 from django.conf import settings
 
 
@@ -53,7 +53,6 @@ class CmdPortal(MuxCommand):
         if not args and 'vanish' not in opt:
             char.msg('Usage: {} <character or NPC>'.format(cmd))
             return
-        session_list = SESSIONS.get_sessions()
         target = []
         # Check for private flag on source room. It must be controlled by summoner if private.
         if loc.tags.get('private', category='flags') and not loc.access(char, 'control'):
@@ -66,10 +65,7 @@ class CmdPortal(MuxCommand):
             char.msg('Portals are currently out of stock or in use elsewhere.')
             return
         portal_enter, portal_exit = obj_pool[-2:]
-        for session in session_list:
-            if not (session.logged_in and session.get_puppet()):
-                continue
-            puppet = session.get_puppet()
+        for puppet in PRESENCE.puppets():
             if lhs.lower() in puppet.get_display_name(char, plain=True).lower():
                 target.append(puppet)
         if len(target) < 1:
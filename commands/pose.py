@@ -2,6 +2,7 @@
 from commands.command import MuxCommand
 from world.helpers import escape_braces, substitute_objects
 from evennia.utils import ansi
+from world.render import RENDER
 
 
 class CmdPose(MuxCommand):
@@ -74,6 +75,7 @@ class CmdPose(MuxCommand):
             return
         set_this = 'pose' if not default else 'pose_default'
         target.db.messages[set_this] = pose
+        RENDER.forget(target)
         return target.db.messages['pose'], target.db.messages['pose_default']
 
     def func(self):
@@ -124,6 +126,7 @@ class CmdPose(MuxCommand):
                 if not target.db.messages:
                     target.db.messages = {}
                 target.db.messages['pose'] = pose
+                RENDER.forget(target)
             elif 'default' in opt:  # Sets doing pose default.
                 self.set_doing(char, pose, target, True)  # True means "set default", not temp doing.
                 char.msg("Default pose is now: '%s%s'" % (target.get_display_name(char), pose))
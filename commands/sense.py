@@ -2,6 +2,7 @@
 from commands.command import MuxCommand
 from django.conf import settings
 from evennia import utils
+from world.verbindex import VERBS  # Verbs an object responds to
 
 # error return function, needed by Extended Look command
 _AT_SEARCH_RESULT = utils.variable_from_module(*settings.SEARCH_AT_RESULT.rsplit('.', 1))
@@ -113,15 +114,10 @@ class CmdSense(MuxCommand):
                         verb_msg = "%s responds to: " % obj.get_display_name(account)
                     else:
                         verb_msg = "%sYou|n respond to: " % char.STYLE
-                    verbs = obj.locks
                     collector_list = []
                     show_red = True if obj.access(char, 'examine') else False
-                    for verb in ("%s" % verbs).split(';'):
-                        element = verb.split(':')[0]
-                        if element == 'call':
-                            continue
-                        name = element[2:] if element[:2] == 'v-' else element
-                        if obj.access(char, element):  # obj lock checked against actor
+                    for name, allowed in VERBS.verbs_of(obj, char, exclude=('call',)):
+                        if allowed:  # obj lock checked against actor
                             collector_list.append("|lctry %s %s|lt|g%s|n|le " %
                                                   (name, obj.get_display_name(char, plain=True), name))
                         elif show_red:
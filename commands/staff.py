@@ -17,7 +17,8 @@ class CmdAudit(MuxCommand):
     """
     Audit to show hosting activity
     Usage:
-      audit [tangible]
+      audit [tangible] [= page]
+    Visitors are listed latest first, 20 to a page.
     """
     key = '@audit'
     locks = 'cmd:perm(audit) or perm(helpstaff)'
@@ -30,39 +31,78 @@ class CmdAudit(MuxCommand):
         # cmd = self.cmdstring
         loc = char.location
         # account = self.account
-        args = self.args
-        # lhs, rhs = self.lhs, self.rhs
+        lhs, rhs = self.lhs, self.rhs
         # opt = self.switches
-        obj_list = char.search(args, quiet=True, candidates=[loc] + loc.contents + char.contents) if args else [char]
+        obj_list = char.search(lhs, quiet=True, candidates=[loc] + loc.contents + char.contents) if lhs else [char]
         if not obj_list:
-            _AT_SEARCH_RESULT(obj_list, char, args, quiet=False)
+            _AT_SEARCH_RESULT(obj_list, char, lhs, quiet=False)
             return  # Trying to audit something that isn't there. "Could not find ''."
         obj = obj_list[0]
         obj_name = obj.get_display_name(char)
-        hosted = obj.db.hosted
-        if hosted:
+        number = int(rhs) if rhs and rhs.strip().isdigit() else 1
+        rows, pages = obj.visits.page(number)
+        if rows:
             import time
             from evennia.utils import utils, evtable
             now = int(time.time())
+            number = min(max(1, number), pages)
+            visits, visitors, since = obj.visits.summary()
             table = evtable.EvTable(border='none', pad_width=0, border_width=0, maxwidth=92)
             table.add_header(obj_name, '|wTimes', '|cLast', '|gFrom')
             table.reformat_column(0, width=25, align='l')
             table.reformat_column(1, width=7, align='c')
             table.reformat_column(2, width=35, align='l')
             table.reformat_column(3, width=25, pad_right=1, align='l')
-            for each in hosted:
-                delta_t = now - hosted[each][0]
-                v_name = each.get_display_name(char)
-                v_count = hosted[each][2]
-                from_name = hosted[each][1].get_display_name(char) if hosted[each][1] else '|where|n'
-                table.add_row(v_name, v_count, utils.time_format(delta_t, 2), from_name)
-            self.msg('[begin] Audit showing visits to:')
+            for visitor, last, source, v_count in rows:
+                v_name = visitor.get_display_name(char)
+                from_name = source.get_display_name(char) if source else '|where|n'
+                table.add_row(v_name, v_count, utils.time_format(now - last, 2), from_name)
+            self.msg('[begin] Audit showing visits to: (page %i of %i)' % (number, pages))
             self.msg(str(table))
-            self.msg('[end] Audit of {}'.format(obj_name))
+            self.msg('[end] Audit of {}: {} visits by {} visitors over {}.'.format(
+                obj_name, visits, visitors, utils.time_format(now - (since or now), 2)))
         else:
             self.msg('No audit information for {}.'.format(obj_name))
 
 
+class CmdMass(MuxCommand):
+    """
+    Check kept mass totals against the contents
+    Usage:
+      mass[/fix] [tangible]
+    Switches:
+    /fix   load again the totals found wrong
+    Walks tangible, or your location, and everything inside it, and
+    lists each whose kept total mass differs from its contents.
+    """
+    key = '@mass'
+    locks = 'cmd:perm(audit) or perm(helpstaff)'
+    help_category = 'Helpstaff'
+    account_caller = True
+
+    def func(self):
+        """Implements checking the mass totals of an object and its contents."""
+        char = self.character
+        loc = char.location
+        args = self.args
+        obj_list = char.search(args, quiet=True, candidates=[loc] + loc.contents + char.contents) if args else [loc]
+        if not obj_list:
+            _AT_SEARCH_RESULT(obj_list, char, args, quiet=False)
+            return
+        obj = obj_list[0]
+        if not hasattr(obj, 'masses'):
+            self.msg('{} has no mass to check.'.format(obj.get_display_name(char)))
+            return
+        from world.helpers import mass_unit
+        fix = 'fix' in self.switches
+        wrong = obj.masses.check(fix=fix)
+        for each, kept, walked in wrong:
+            self.msg('{} kept |y{}|n, contents total |g{}|n.'.format(
+                each.get_display_name(char), mass_unit(kept), mass_unit(walked)))
+        self.msg('Mass of {} ({}): {} wrong{}.'.format(obj.get_display_name(char), mass_unit(obj.get_mass()),
+                                                      len(wrong), ', fixed' if wrong and fix else ''))
+
+
 class CmdWall(MuxCommand):
     """
     make an announcement to all
@@ -2,7 +2,7 @@
 import evennia
 from evennia.utils.utils import delay
 from commands.command import MuxCommand
-from evennia.server.sessionhandler import SESSIONS
+from world.presence import PRESENCE
 
 
 class CmdSummon(MuxCommand):
@@ -47,12 +47,8 @@ class CmdSummon(MuxCommand):
         if not args:
             char.msg("Could not find target to summon. Usage: summon <character or NPC>")
             return
-        session_list = SESSIONS.get_sessions()
         target = []
-        for session in session_list:
-            if not (session.logged_in and session.get_puppet()):
-                continue
-            puppet = session.get_puppet()
+        for puppet in PRESENCE.puppets():
             if lhs.lower() in puppet.get_display_name(char, plain=True).lower():
                 target.append(puppet)
         if len(target) < 1:
@@ -3,6 +3,7 @@ from commands.command import MuxCommand
 from evennia import syscmdkeys, Command
 from evennia.utils.utils import string_suggestions
 from world.verbs import VerbHandler
+from world.verbindex import VERBS  # Verbs of objects nearby, from their compiled lock tables
 
 
 class CmdTry(MuxCommand):
@@ -80,25 +81,13 @@ class CmdTry(MuxCommand):
 
     def verb_list(self, search_verb=None):
         """
-        Scan location for objects that have verbs, and collect the verbs in a list or, if verb given,
-        scan location for objects that have a specific verb, and collect the objects in a list.
+        List the verbs available from objects in location and inventory or, if verb given,
+        list the objects there that respond to that verb. Answered from the verb index.
         """
-        collection = []
         char = self.character
-        here = char.location
-        surroundings = ([here] + here.contents + char.contents) if here else ([char] + char.contents)
-        for obj in surroundings:
-            verbs = obj.locks
-            for verb in ("%s" % verbs).split(';'):
-                element = verb.split(':')[0]
-                name = element[2:] if element[:2] == 'v-' else element
-                if not obj.access(char, element):  # search_verb on object is inaccessible.
-                    continue
-                if name == search_verb:
-                    collection.append(obj)  # Collect objects that are accessible.
-                elif search_verb is None:
-                    collection.append(name)
-        return list(set(collection))
+        if search_verb is None:
+            return VERBS.available(char)
+        return VERBS.responders(char, search_verb)
 
     @staticmethod
     def style_object_list(objects, viewer):
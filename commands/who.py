@@ -4,6 +4,11 @@ from commands.command import MuxAccountCommand
 from django.conf import settings
 from evennia.server.sessionhandler import SESSIONS
 from evennia.utils import ansi, utils, create, search, evtable
+from world.exitgraph import SIMPLE_DIRECTIONS
+from world.pathfind import room_of
+from world.occupancy import OCCUPANCY
+from world.presence import PRESENCE
+from world.routing import ROUTES
 
 
 class CmdWho(MuxAccountCommand):
@@ -61,6 +66,8 @@ class CmdWho(MuxAccountCommand):
             #
             # WA with name parameters to pull up more extensive information about the direction
             # Highest Occupants (since last reboot), Last Visited, Last Busy (3+) etc. (more ideas here)
+            # Avg Time is the average stay over the last day, and Top 3 Active those entering the
+            # most commands there in the last hour, from world.occupancy.
             table.add_header('|wOcc', '|wLocation', '|wAvg Time', '|cTop 3 Active', '|gDirections')
             table.reformat_column(0, width=4, align='l')
             table.reformat_column(1, width=25, align='l')
@@ -74,11 +81,15 @@ class CmdWho(MuxAccountCommand):
                 if character.location not in locations:
                     locations[character.location] = []
                 locations[character.location].append(character)  # Build the list of who's in a location
+            my_character = self.caller.get_puppet(self.session)
+            my_room = room_of(my_character) if my_character else None
             for place in locations:
                 location = place.get_display_name(you) if place else (settings.NOTHINGNESS + '|n')
-                table.add_row(len(locations[place]), location, '?',
-                              ', '.join(each.get_display_name(you) for each in locations[place]),
-                              '')  # TODO - Directions to location
+                dwell = OCCUPANCY.average_dwell(place)
+                active = OCCUPANCY.most_active(place, 3, 3600) or locations[place][:3]
+                table.add_row(len(locations[place]), location, utils.time_format(dwell, 1) if dwell else '?',
+                              ', '.join(each.get_display_name(you) for each in active),
+                              self.directions(my_room, place))
         elif cmd == 'ws':
             my_character = self.caller.get_puppet(self.session)
             if not (my_character and my_character.location):
@@ -88,9 +99,7 @@ class CmdWho(MuxAccountCommand):
             table.reformat_column(0, width=45, align='l')
             table.reformat_column(1, width=8, align='l')
             table.reformat_column(2, width=7, pad_right=1, align='r')
-            for element in my_character.location.contents:
-                if not element.has_account:
-                    continue
+            for element in PRESENCE.characters(my_character.location):
                 delta_cmd = time.time() - max([each.cmd_last_visible for each in element.sessions.all()])
                 delta_con = time.time() - min([each.conn_time for each in element.sessions.all()])
                 name = element.get_display_name(you)
@@ -154,6 +163,19 @@ class CmdWho(MuxAccountCommand):
         self.msg(table)
         self.msg(string + notice)
 
+    @staticmethod
+    def directions(here, place):
+        """First step from here toward place, by the zone routing tables."""
+        if not (here and place):
+            return ''
+        if room_of(place) == here:
+            return 'here'
+        hop = ROUTES.next_hop(here, room_of(place))
+        if not hop:
+            return ''
+        way = hop[0]
+        return SIMPLE_DIRECTIONS.get(way, way) if isinstance(way, basestring) else way.key
+
     def option_sort(self, to_sort, sort_type='alpha', reverse=False):
         opt = self.switches
         if not (sort_type == 'alpha' and 'alpha' in opt):
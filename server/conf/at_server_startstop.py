@@ -22,7 +22,28 @@ def at_server_start():
     This is called every time the server starts up, regardless of
     how it was shut down.
     """
-    pass
+    from world.spatial import SPATIAL_INDEX
+    SPATIAL_INDEX.rebuild()  # Room coordinates held in memory for get_room_at and get_rooms_around
+    from world.exitgraph import EXIT_GRAPH
+    EXIT_GRAPH.connect()  # Exits created or re-targeted without move hooks invalidate their rooms
+    from world.roomnames import ROOM_NAMES
+    ROOM_NAMES.connect()  # Room name prefix index kept current for the exit commands
+    from world.speechnames import SPEECH_NAMES
+    SPEECH_NAMES.connect()  # Names for /name substitution in speech dropped on renames
+    from world import mass
+    mass.connect()  # Kept mass totals follow weightless flags set and removed
+    from world.access import ACCESS
+    ACCESS.connect()  # Kept lock check results dropped on moves, lock and permission edits
+    from evennia.utils import create, search
+    if not search.search_script('routing'):  # Zone routing tables for seek and where
+        create.create_script('typeclasses.scripts.RoutingScript')
+    from world.weather import WEATHER, remove_tickers
+    remove_tickers()  # Weather is scheduled by the weather script, not per-room tickers
+    WEATHER.connect()  # Rooms given a new zone or area tag move to that region's weather
+    if not search.search_script('weather'):
+        create.create_script('typeclasses.scripts.WeatherScript')
+    from world.movement import MOVEMENT
+    MOVEMENT.restore()  # Travellers left inside path exits carry on their journeys
 
 
 def at_server_stop():
@@ -30,7 +51,10 @@ def at_server_stop():
     This is called just before the server is shut down, regardless
     of it is for a reload, reset or shutdown.
     """
-    pass
+    from world.gridcells import flush_all
+    flush_all()  # Save grid cell chunks changed since the last save
+    from world.movement import MOVEMENT
+    MOVEMENT.save()  # Journeys on path exits, restored at the next start
 
 
 def at_server_reload_start():
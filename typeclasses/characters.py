@@ -9,7 +9,11 @@ from evennia import DefaultCharacter
 from typeclasses.tangibles import Tangible
 from evennia.utils.utils import lazy_property
 from typeclasses.traits import TraitHandler
-from world.helpers import make_bar, mass_unit
+from world.helpers import make_bar, mass_unit, escape_braces
+from world.announce import Announcement  # Movement messages rendered once per kind of viewer
+from world.presence import PRESENCE  # Puppeted characters by location
+from world.groups import GROUPS  # Followers and riders
+from world.render import RENDER  # Names kept within a command forget a reset pose
 from evennia.contrib.clothing import get_worn_clothes
 from evennia.utils import list_to_string
 from evennia.utils import ansi
@@ -129,24 +133,25 @@ class Character(DefaultCharacter, Tangible):
         if self.db.Combat_TurnHandler:  # Prevent move while in combat.
             self.caller.msg("You can't leave while engaged in combat!")
             return False
-        if self.attributes.has('riders') and self.db.riders and self.location:  # Test list of riders.
+        riders = GROUPS.party(self, self.location)[0]
+        if riders:  # Test list of riders here.
             self.ndb.riders = []
             if self.db.settings and 'carry others' in self.db.settings and self.db.settings['carry others'] is False:
                 return True  # Character has riders, but does not want to carry them.
-            for each in self.db.riders:
-                if each.location == self.location:
-                    each.ndb.mover = self
-                    if not (each.has_account and each.at_before_move(destination)):
+            for each in riders:
+                each.ndb.mover = self
+                if not (each.has_account and each.at_before_move(destination)):
+                    continue
+                if each.db.settings and 'carry others' in each.db.settings and each.db.settings['carry others']\
+                        is False:
                         continue
-                    if each.db.settings and 'carry others' in each.db.settings and each.db.settings['carry others']\
-                            is False:
-                            continue
-                    self.ndb.riders.append(each)
-                    self.location.at_object_leave(each, destination)
+                self.ndb.riders.append(each)
+                self.location.at_object_leave(each, destination)
         return True
 
     def at_after_move(self, source_location):
         """Store last location and room then trigger the arrival look after a move. Reset doing to default."""
+        PRESENCE.update(self)
         if self.db.messages and self.db.messages.get('location'):
             loc_name = self.location.get_display_name(self, plain=True)
             self.msg(self.db.messages.get('location') + loc_name)
@@ -158,23 +163,17 @@ class Character(DefaultCharacter, Tangible):
         if self.location:  # Things to do after the character moved somewhere
             if self.db.messages:
                 self.db.messages['pose'] = self.db.messages.get('pose_default', None)  # Reset room pose after moving.
+                RENDER.forget(self)
             if self.location.access(self, 'view'):  # No need to look if moving into Nothingness, locked from looking
                 if not self.db.settings or self.db.settings.get('look arrive', default=True):
                     self.msg(text=(self.at_look(self.location), dict(type='look', window='room')))
-            followers = self.db.followers
-            if source_location and (not not followers) and self.ndb.exit_used:
-                for each in source_location.contents:
-                    if not each.has_account or each not in followers or not self.access(each, 'view'):
-                        continue  # no account, not on follow list, or can't see character to follow, then do not follow
-                    # About to follow - check if follower is riding something:
-                    riding = False
-                    for thing in source_location.contents:
-                        if thing == each or not thing.db.riders or each not in thing.db.riders:
-                            continue
-                        riding = True
-                    if not riding:
-                        print('<%s> %s' % (each, self.ndb.exit_used))
-                        each.execute_cmd(self.ndb.exit_used)
+            if source_location and self.ndb.exit_used:
+                # Followers left behind who are not riding something there follow, if they can see you.
+                for each in GROUPS.party(self, source_location)[1]:
+                    if not each.has_account or not self.access(each, 'view'):
+                        continue  # no account, or can't see character to follow, then do not follow
+                    print('<%s> %s' % (each, self.ndb.exit_used))
+                    each.execute_cmd(self.ndb.exit_used)
         return source_location
 
     def announce_move_from(self, destination):
@@ -192,22 +191,17 @@ class Character(DefaultCharacter, Tangible):
                                                     self.ndb.moving_to)) if self.ndb.moving_to else ''
         # TODO - if character leaving is invisible to viewer and all riders are invisible, then no message sent
         # to viewer, otherwise anyone invisible is listed as "Someone"
-        for viewer in here.contents:
-            if viewer == self:
-                continue
-            name = self.get_display_name(viewer, color=False)
-            loc_name = self.location.get_display_name(viewer)
-            dest_name = destination.get_display_name(viewer)
-            message = ['|r%s' % name]
-            if self.ndb.riders and len(self.ndb.riders) > 0:  # Plural exit message: Riders
-                if len(self.ndb.riders) > 1:
-                    for rider in self.ndb.riders[:-1]:
-                        message.append('|n, |r' + rider.get_display_name(viewer, color=False))
-                message.append(' and |r%s|n are ' % self.ndb.riders[-1].get_display_name(viewer, color=False))
-            else:  # Singular exit message: no riders
-                message.append(' is ')
-            message.append('leaving %s, heading%s for %s.' % (loc_name, direction_name, dest_name))
-            viewer.msg(''.join(message))
+        riders = self.ndb.riders or []
+        names = [(each, dict(color=False)) for each in [self] + riders] + [(here, {}), (destination, {})]
+        message = ['|r{0}']
+        if riders:  # Plural exit message: Riders
+            message.extend('|n, |r{%i}' % i for i in range(1, len(riders)))
+            message.append(' and |r{%i}|n are ' % len(riders))
+        else:  # Singular exit message: no riders
+            message.append(' is ')
+        message.append('leaving {%i}, heading%s for {%i}.'
+                       % (len(riders) + 1, escape_braces(direction_name), len(riders) + 2))
+        Announcement(''.join(message), names).send(here.contents, exclude=self)
 
     def announce_move_to(self, source_location):
         """
@@ -224,31 +218,27 @@ class Character(DefaultCharacter, Tangible):
             return
         direction_name = ('|lc%s|lt|530%s|n|le' % (self.ndb.moving_from,
                                                    self.ndb.moving_from)) if self.ndb.moving_from else ''
-        for viewer in here.contents:
-            if viewer == self:
-                continue
-            src_name = settings.NOTHINGNESS
-            if source_location:
-                src_name = source_location.get_display_name(viewer)
-            message = ['|g%s' % self.get_display_name(viewer, color=False)]
-            if here:
-                depart_name = here.get_display_name(viewer)
-            else:
-                depart_name = settings.NOTHINGNESS
-            if self.ndb.riders and len(self.ndb.riders) > 0:
-                if len(self.ndb.riders) > 1:
-                    message.append(', |g' + '%s' % '|n, |g'.join(rider.get_display_name(viewer, color=False))
-                                   for rider in self.ndb.riders[:-1])
-                    message.append('|n and |g%s|n arrive ' % self.ndb.riders[-1].get_display_name(viewer, color=False))
-                else:
-                    message.append(' and |g%s|n arrive ' % self.ndb.riders[-1].get_display_name(viewer, color=False))
-            else:
-                message.append(' arrives ')
-            if direction_name:
-                message.append('to %s|n from the %s from %s|n.' % (depart_name, direction_name, src_name))
-            else:
-                message.append('to %s|n from %s|n.' % (depart_name, src_name))
-            viewer.msg(''.join(message))
+        riders = self.ndb.riders or []
+        names = [(each, dict(color=False)) for each in [self] + riders] + [(here, {})]
+        message = ['|g{0}']
+        if len(riders) > 1:
+            message.append(', |g' + '|n, |g'.join('{%i}' % i for i in range(1, len(riders))))
+            message.append('|n and |g{%i}|n arrive ' % len(riders))
+        elif riders:
+            message.append(' and |g{1}|n arrive ')
+        else:
+            message.append(' arrives ')
+        if source_location:
+            names.append((source_location, {}))
+            src_name = '{%i}' % (len(riders) + 2)
+        else:
+            src_name = escape_braces(settings.NOTHINGNESS)
+        if direction_name:
+            message.append('to {%i}|n from the %s from %s|n.'
+                           % (len(riders) + 1, escape_braces(direction_name), src_name))
+        else:
+            message.append('to {%i}|n from %s|n.' % (len(riders) + 1, src_name))
+        Announcement(''.join(message), names).send(here.contents, exclude=self)
         if self.ndb.riders and len(self.ndb.riders) > 0:
             for each in self.ndb.riders:
                 success = each.move_to(here, quiet=True, emit_to_obj=None, use_destination=False,
@@ -292,6 +282,7 @@ class Character(DefaultCharacter, Tangible):
         account and sessions at this point; the last entry in the
         list from `self.sessions.get()` is the latest Session puppeting this Object.
         """
+        PRESENCE.update(self)
         sessions = self.sessions.get()
         session = sessions[-1] if sessions else None
         if len(sessions) == 1:  # Skip re-stamping if the object is already puppeted.
@@ -335,6 +326,7 @@ class Character(DefaultCharacter, Tangible):
             session (Session): Session controlling the connection that
                 just disconnected.
         """
+        PRESENCE.update(self)
         if self.has_account:  # if there's still a session controlling ...
             return  # ... then there's nothing more to do.
         if self.location:
@@ -502,6 +494,7 @@ class NPC(Character):
         Called just after puppeting has been completed and all
         account<->Object links have been established.
         """
+        PRESENCE.update(self)
         self.msg("\nYou assume the role of %s.\n" % self.get_display_name(self))
         self.msg(self.at_look(self.location))
         if self.ndb.new_mail:
@@ -539,6 +532,7 @@ class NPC(Character):
             session (Session): Session controlling the connection that
                 just disconnected.
         """
+        PRESENCE.update(self)
         if self.location:
             if self.has_account:  # Show as pose if NPC still being puppeted.
                 for each in self.location.contents:
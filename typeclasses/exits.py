@@ -6,12 +6,15 @@ for allowing Characters to traverse the exit to its destination, or if the
 Character fails to pass the traverse lock, and the exit has a home set, the
 traversing Character it is sent to the Exit's home, instead.
 """
-from evennia import utils, Command
+from evennia import Command
 from evennia import DefaultExit
 from typeclasses.tangibles import Tangible
 from evennia.utils.utils import lazy_property
 from django.conf import settings
 from typeclasses.traits import TraitHandler
+from world.exitgraph import EXIT_GRAPH
+from world.movement import MOVEMENT
+from world.access import ACCESS  # Kept lock check results
 
 
 MOVE_DELAY = dict(stroll=16, walk=8, run=4, sprint=2, scamper=1)  # TODO Lookup, calculate
@@ -103,11 +106,11 @@ class Exit(DefaultExit, Tangible):
 
     def at_traverse(self, traveller, destination):
         """
-        Implements the actual traversal, using utils.delay to delay the move_to.
+        Implements the actual traversal, using the movement scheduler to delay the move_to.
         if the exit has an attribute is_path and and traveller has move_speed,
         use that, otherwise default to normal exit behavior and "walk" speed.
         """
-        if traveller.ndb.currently_moving:
+        if MOVEMENT.moving(traveller):
             traveller.msg("You are already moving toward %s." % destination.get_display_name(traveller))
             return False
         entry = self.cmdset.current.commands[0].cmdstring  # The name/alias of the exit used to initiate traversal
@@ -125,6 +128,7 @@ class Exit(DefaultExit, Tangible):
                 if grid_loc:
                     traveller.ndb.grid_loc_last = grid_loc
                 traveller.ndb.grid_loc = coord
+                ACCESS.clear()  # on_exit locks read the cell
                 name = destination.point(coord, 'name') or ''
                 print('%s> %r (%s->%s: %s@%r)' % (traveller, entry, source_location, destination, name, coord))
         if not is_path:
@@ -134,28 +138,22 @@ class Exit(DefaultExit, Tangible):
             return success
         if traveller.location == destination:  # If object is at destination...
             return True
-
-        def move_callback():
-            """This callback will be called by utils.delay after move_delay seconds."""
-            start_location = traveller.location
-            if traveller.move_to(destination):
-                traveller.nattributes.remove('currently_moving')
-                self.at_after_traverse(traveller, start_location)
-            else:
-                self.at_failed_traverse(traveller)
-
         traveller.msg("You start moving %s at a %s." % (self.key, move_speed))
         if traveller.location != self:  # If object is not inside exit...
             success = traveller.move_to(self, quiet=False, use_destination=False)
             if not success:
                 return False
             self.at_after_traverse(traveller, source_location)
-        # Create a delayed movement and Store the deferred on the moving object.
-        # ndb is used since deferrals cannot be pickled to store in the database.
-        deferred = utils.delay(move_delay, callback=move_callback)
-        traveller.ndb.currently_moving = deferred
+        MOVEMENT.start(traveller, self, move_delay)  # Arrives by finish_traverse after move_delay seconds.
         return True
 
+    def finish_traverse(self, traveller):
+        """Called by the movement scheduler when traveller, inside this path, reaches the destination."""
+        if traveller.move_to(self.destination):
+            self.at_after_traverse(traveller, self)
+        else:
+            self.at_failed_traverse(traveller)
+
     def at_failed_traverse(self, traveller):
         """
         Overloads the default hook to implement an exit fail.
@@ -174,7 +172,7 @@ class Exit(DefaultExit, Tangible):
             traveller.msg("You cannot go there.")
         if self.home:  # If the exit has a "home" location, it sends you there if you fail the lock.
             if traveller.move_to(self.home):
-                traveller.nattributes.remove('currently_moving')
+                MOVEMENT.cancel(traveller)
         traveller.nattributes.remove('grid_loc_last')
 
     def at_after_traverse(self, traveller, source_location):
@@ -184,6 +182,11 @@ class Exit(DefaultExit, Tangible):
         # if not self.db.grid_loc or not self.db.grid_locs:  # Object exit command display  # DEBUG
         #     print('%s> %r (%s->%s)' % (traveller, entry, source_location, traveller.location))  # DEBUG
 
+    def at_object_delete(self):
+        """Called just before deleting the exit. Its room forgets the way out."""
+        EXIT_GRAPH.invalidate(self.location, EXIT_GRAPH.listed.pop(self, None))
+        return super(Exit, self).at_object_delete()
+
     def at_msg_receive(self, text=None, **kwargs):
         """!"""
         # Anything heard by self (this exit) as character speech will be sent to its destination's contents,
@@ -235,13 +238,10 @@ class CmdStop(Command):
 
     def func(self):
         """
-        This is a very simple command, using the
-        stored deferred from the exit traversal above.
+        This is a very simple command, pausing the journey
+        in the movement scheduler until continued.
         """
-        currently_moving = self.caller.ndb.currently_moving
-        if currently_moving:
-            currently_moving.cancel()  # disables the trigger.
-            self.caller.nattributes.remove('currently_moving')  # Removes the trigger.
+        if MOVEMENT.stop(self.caller):
             self.caller.msg("You stop moving.")
         else:
             self.caller.msg("You are not moving.")
@@ -249,7 +249,7 @@ class CmdStop(Command):
 
 class CmdContinue(Command):
     """
-    Move again: Exit the path into the room if stopped.
+    Move again: Carry on toward the room if stopped.
     Usage:
       continue || move || go
     """
@@ -259,15 +259,17 @@ class CmdContinue(Command):
     help_category = 'Travel'
 
     def func(self):
-        """This just moves you if you're stopped."""
+        """This carries on your journey if you stopped, or moves you on if it has no journey to resume."""
         caller = self.caller
         start = caller.location
         destination = caller.location.destination
         if not destination:
             caller.msg("You have not yet decided which way to go.")
             return
-        if caller.ndb.currently_moving:
+        if MOVEMENT.moving(caller):
             caller.msg("You are already moving toward %s." % destination.get_display_name(caller))
+        elif MOVEMENT.resume(caller):
+            caller.msg("You carry on toward %s." % destination.get_display_name(caller.sessions))
         else:
             caller.location.msg_contents("%s is going to %s." %
                                          (caller.get_display_name(caller.sessions),
@@ -330,7 +332,6 @@ class CmdBack(Command):
                 else:
                     char.msg("You can not leave %s." % here.get_display_name(char.sessions))
             return
-        elif char.ndb.currently_moving:  # If you are inside an exit,
-            char.execute_cmd('stop')  # traveling, then stop, go back.
+        MOVEMENT.cancel(char)  # If you are inside an exit, traveling or stopped, go back.
         char.msg("You turn around and go back the way you came.")
         char.move_to(start)
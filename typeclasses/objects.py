@@ -381,7 +381,7 @@ class Consumable(Object):  # TODO: State and analog decay. (State could be discr
                 # self.location = None # Leaves empty container.
         else:
             finish = ', finishing it'
-            self.location = None
+            self.leave_location()
         caller.location.msg_contents('{caller} takes a drink of {drink}%s.'
                                      % finish, from_obj=caller, mapping=dict(char=caller, drink=self))
 
@@ -406,10 +406,10 @@ class Consumable(Object):  # TODO: State and analog decay. (State could be discr
             self.traits.health.current -= 1
             if self.traits.health.actual < 1:
                 finish = ', finishing it'
-                self.location = None
+                self.leave_location()
         else:
             finish = ', finishing it'
-            self.location = None
+            self.leave_location()
         msg = "%s%s|n takes a bite of %s%s|n%s." % (caller.STYLE, caller.key, self.STYLE, self.key, finish)
         caller.location.msg_contents(msg)
         return None
@@ -3,15 +3,20 @@
 Rooms are simple containers that need no location of their own.
 """
 import time  # Check time since last activity
-import random  # Random weather events
 from math import sqrt  # Distance formula for coordinate
-from evennia.server.sessionhandler import SESSIONS  # Checking sessions for active accounts in room
+from world.spatial import SPATIAL_INDEX  # In-memory index of room coordinates
+from world.spatial import COORD_CATEGORY, LEGACY_CATEGORIES, pack_coord, unpack_coord
+from world.exitgraph import EXIT_GRAPH, SIMPLE_DIRECTIONS  # Adjacency of rooms through both kinds of exit
+from world.presence import PRESENCE  # Checking for active accounts in room
+from world.roomnames import ROOM_NAMES  # Finding rooms by name prefix
+from world.groups import GROUPS  # Followers and riders moving along on the grid
+from world.weather import WEATHER  # Scheduling weather updates
+from world.gridcells import CellStore, CellContents, TrailStore  # Cells, contents and trails of Grid rooms
+from world import minimap  # Drawing Grid rooms
+from world.access import ACCESS  # Kept lock check results, dropped when a grid move changes on_exit
 from typeclasses.tangibles import Tangible
 from evennia.utils.utils import lazy_property
 from typeclasses.traits import TraitHandler
-from evennia import TICKER_HANDLER  # TICKERS for weather events
-from evennia.comms.models import ChannelDB, Msg  # Sending active/inactive status to public channel
-from evennia.comms.channelhandler import CHANNELHANDLER
 from evennia import CmdSet  # For the class Grid
 from evennia import default_cmds  # For the class Grid's commands
 # Below used for CmdExit
@@ -19,9 +24,16 @@ from commands.command import MuxCommand  # For the class Room's command
 from evennia.utils import search
 from evennia.utils import create
 from django.conf import settings
-from django.db.models import Q
 from evennia.objects.models import ObjectDB
-from evennia.utils.utils import inherits_from, class_from_module
+from evennia.typeclasses.tags import Tag  # Range queries on packed coordinates
+from evennia.utils.utils import class_from_module
+
+
+EXIT_ORDER = dict((name, i) for i, name in enumerate((
+    u'north', u'south', u'east', u'west', u'northeast', u'northwest', u'southeast', u'southwest',
+    u'up', u'down', u'in', u'out')))  # Order exits are listed in a room's appearance
+_APPEARANCE = {}  # Room: (desc, desc_brief, text, exits) cached by Room.appearance_parts
+EXIT_GRAPH.watch(lambda room: _APPEARANCE.pop(room, None))
 
 
 class CmdExit(MuxCommand):  # To perch on rooms for simple direction-based attribute exits.
@@ -107,18 +119,7 @@ class CmdExit(MuxCommand):  # To perch on rooms for simple direction-based attri
 
         def find_by_name(search):
             search = search.strip().split(';', 1)[0]
-            keyquery = Q(db_key__istartswith=search)
-            aliasquery = Q(db_tags__db_key__istartswith=search,
-                           db_tags__db_tagtype__iexact='alias')
-
-            results = ObjectDB.objects.filter(keyquery | aliasquery).distinct()
-            nresults = results.count()
-
-            if nresults:  # convert multiple results to typeclasses.
-                results = [result for result in results]
-                room_typeclass = settings.BASE_ROOM_TYPECLASS  # Narrow results to only room types.
-                results = [obj for obj in results if inherits_from(obj, room_typeclass)]
-            return results
+            return ROOM_NAMES.find(search)
 
         def add(you_add, loc_add, ways_add):
             """"Command for adding an exit - checks location and permissions."""
@@ -137,6 +138,7 @@ class CmdExit(MuxCommand):  # To perch on rooms for simple direction-based attri
                 if loc_add.access(you_add, 'edit'):
                     if ways_add[direction].access(you_add, 'control'):
                         loc_add.db.exits = ways_add
+                        EXIT_GRAPH.invalidate(loc_add)
                         you_add.msg("|gAdded|n exit |lc%s|lt|530%s|n|le from %s to %s." %
                                     (self.key, self.key, loc_add.get_display_name(you),
                                      ways_add[direction].get_display_name(you)))
@@ -168,6 +170,7 @@ class CmdExit(MuxCommand):  # To perch on rooms for simple direction-based attri
                 tun_ways[back_dir(dir_tun)] = loc_tun
                 if dest_tun.access(you_tun, 'control'):
                     dest_tun.db.exits = tun_ways
+                    EXIT_GRAPH.invalidate(dest_tun)
                     you_tun.msg("|gAdded|n exit |530%s|n back from %s to %s." %
                                 (long_dir(back_dir(dir_tun)), dest_tun.get_display_name(you),
                                  loc_tun.get_display_name(you)))
@@ -211,11 +214,13 @@ class CmdExit(MuxCommand):  # To perch on rooms for simple direction-based attri
                     if loc.access(you, 'edit'):
                         del(ways[direction])
                         loc.db.exits = ways
+                        EXIT_GRAPH.invalidate(loc)
                         you.msg("|rRemoved|n exit |530%s|n from %s." % (self.key, loc.get_display_name(you)))
                     if ('tun' in switches or 'none' in switches) and tunnel_ways:
                         if dest.access(you, 'edit'):
                             del(tunnel_ways[tunnel_way])
                             dest.db.exits = tunnel_ways
+                            EXIT_GRAPH.invalidate(dest)
                             you.msg("|rRemoved|n exit |530%s|n from %s." %
                                     (long_dir(tunnel_way), dest.get_display_name(you)))
                         else:
@@ -245,6 +250,7 @@ class CmdExit(MuxCommand):  # To perch on rooms for simple direction-based attri
                 elif 'del' in switches or 'none' in switches:
                     if direction in ways:
                         del(ways[direction])
+                        EXIT_GRAPH.invalidate(loc)
                         you.msg("Exit |530%s|n was not valid. (|rremoved|n)" % self.key)
                     else:
                         you.msg("Exit |530%s|n does not exist here." % self.key)
@@ -285,6 +291,7 @@ class CmdExit(MuxCommand):  # To perch on rooms for simple direction-based attri
                 if not switches:
                     if direction in ways:
                         del(ways[direction])
+                        EXIT_GRAPH.invalidate(loc)
                         you.msg("Exit |530%s|n was not valid. (|rremoved|n)" % self.key)
                     else:
                         you.msg("You cannot travel %s." % self.key)
@@ -422,7 +429,7 @@ class Room(Tangible):
     """
     Rooms' location is usually None (which is default), but represent
     geographic locations with coordinates (x, y, and z) that
-    are stored as tags, allowing for an efficient and quick search in the
+    are stored as one packed tag, allowing for an efficient and quick search in the
     database, and simplify the task when retrieving a room at a given
     position, or looking for rooms around a given position.
     """
@@ -438,62 +445,51 @@ class Room(Tangible):
         """
         if not (viewer and viewer.has_account):
             return ''
-        # get and identify all objects visible to the viewer, excluding the viewer.
-        visible = (con for con in self.contents if con != viewer and con.access(viewer, 'view'))
-        exits, ways = [], []
-
-        way_dir = {'ne': 'northeast', 'n': 'north', 'nw': 'northwest', 'e': 'east',
-                   'se': 'southeast', 's': 'south', 'sw': 'southwest', 'w': 'west', 'u': 'up', 'd': 'down'}
-
-        default_exits = [u'north', u'south', u'east', u'west', u'northeast', u'northwest', u'southeast', u'southwest',
-                         u'up', u'down', u'in', u'out']
-
-        exits_simple, exits_complex = [], []
-
-        def sort_exits(x, y):
-            """sort supplied list of exit strings, based on default_exits, returns sorted list."""
-            matches = []  # start empty and build a sorted list
-            for j in default_exits:
-                for i, easy in enumerate(x):
-                    if j == easy:
-                        matches.append(y[i])
-            s = set(matches)  # Set magic for adding back non-matches.
-            return matches + [z for z in y if z not in s]
-
-        for con in visible:
-            if con.destination:
-                exits.append(con)
-        message = ['\n%s\n' % self.get_display_name(viewer, mxp='sense here')]
-        desc = self.db.desc  # get description, build string
-        desc_brief = self.db.desc_brief
-        if desc:
-            message.append('%s' % desc)
-        elif desc_brief:
-            message.append('%s' % desc_brief)
-        else:
-            message.append('Nothing more than smoke and mirrors appears around you.')
-        if self.attributes.has('exits'):
-            ways = self.db.exits
-        if exits or ways:
+        desc, exits = self.appearance_parts()
+        message = ['\n%s\n' % self.get_display_name(viewer, mxp='sense here'), desc]
+        # Show exits visible to the viewer, already in direction order.
+        exits = [(e, name) for e, name in exits if e is None or e.access(viewer, 'view')]
+        if exits:
             message.append('\n|wVisible exits|n: ')
-            for e in exits:  # Green or Blue exits
-                exits_simple.append(e.name)
-                exit_color = '|225' if e.tags.get('path', category='flags') or False else e.STYLE  # Blue if path exit
-                exits_complex.append('|lc%s|lt%s%s|n|le' % (e.key, exit_color, e.key))
-            if ways and not ways == {}:  # Orange exits
-                for w in ways:
-                    exits_simple.append(way_dir[w])
-                    exits_complex.append('|lc%s|lt|530%s|n|le' % (w, way_dir[w]))
-            message.append(', '.join(d for d in sort_exits(exits_simple, exits_complex)))
+            shown = []
+            for e, name in exits:
+                if e is None:  # Orange exits
+                    shown.append('|lc%s|lt|530%s|n|le' % (name, SIMPLE_DIRECTIONS[name]))
+                else:  # Green or Blue exits
+                    exit_color = '|225' if e.tags.get('path', category='flags') else e.STYLE  # Blue if path exit
+                    shown.append('|lc%s|lt%s%s|n|le' % (e.key, exit_color, e.key))
+            message.append(', '.join(shown))
         elif viewer.db.last_room:
             message.append('\n|wVisible exits|n: |lcback|lt|gBack|n|le to %s.'
                            % viewer.db.last_room.get_display_name(viewer))
         if self.ndb.weather_last:
             message.append('|/|X|[w%s|n' % self.ndb.weather_last)
-        if self.return_glance(viewer, bool=True):  # Glance to see what is within the room that can be seen
-            message.append(("\n|wHere you find:|n " + self.return_glance(viewer)))  # Glance again to list items.
+        glance = self.return_glance(viewer, quiet=True)  # Glance once to list what can be seen in the room
+        if glance:
+            message.append("\n|wHere you find:|n " + glance)
         return ''.join(message)
 
+    def appearance_parts(self):
+        """
+        The viewer-independent parts of return_appearance, cached until
+        this room's description or exits change.
+        Returns:
+            (desc, exits) where desc is the description text and exits is a
+            list of (exit, name) in direction order: exit is the Exit object,
+            or None for a simple exit named by its direction.
+        """
+        desc, desc_brief = self.db.desc, self.db.desc_brief
+        cached = _APPEARANCE.get(self)
+        if cached and cached[0] == desc and cached[1] == desc_brief:
+            return cached[2], cached[3]
+        text = desc or desc_brief or 'Nothing more than smoke and mirrors appears around you.'
+        exits = [(e, e.name) for e in EXIT_GRAPH.exit_objects(self)]
+        exits += [(None, way) for way, _ in EXIT_GRAPH.simple_exits(self)]
+        last = len(EXIT_ORDER)  # Exits not in EXIT_ORDER follow the rest in the order found.
+        exits.sort(key=lambda pair: EXIT_ORDER.get(pair[1] if pair[0] else SIMPLE_DIRECTIONS[pair[1]], last))
+        _APPEARANCE[self] = (desc, desc_brief, text, exits)
+        return text, exits
+
     def announce_move_from(self, destination):
         """
         Called if the move is to be announced. This is
@@ -538,92 +534,45 @@ class Room(Tangible):
             source_location (Object): the previous location of new_arrival.
         """
         super(Room, self).at_object_receive(new_arrival, source_location)
+        if new_arrival.destination:  # An exit was added to this room.
+            EXIT_GRAPH.invalidate(self)
         if self.tags.get('rp', category='flags') and not new_arrival.attributes.has('_sdesc'):
             sdesc = self.db.messages and self.db.messages.get('species') or new_arrival.key
             new_arrival.sdesc.add(sdesc)
         if new_arrival.has_account:  # and not new_arrival.is_superuser: # this is a character
             if self.tags.get('weather', category='flags'):
+                WEATHER.register(self)  # Region queued for weather updates while occupied.
                 if not self.nattributes.has('weather_time'):
-                    self.attempt_weather_update(1.00)  # 100% chance of update on initial arrival.
-                tickers = TICKER_HANDLER.all_display()
-                counter = 0
-                for tick in tickers:
-                    if tick[0] == self and tick[1] == 'update_weather':
-                        notice = ''
-                        counter += 1
-                        show = '15%% chance every %s seconds in ' % tick[3]
-                        show += "%s%s" % (tick[0] or "[None]", tick[0] and " (#%s)" %
-                                          (tick[0].id if hasattr(tick[0], 'id') else '') or '')
-                        if counter > 1:
-                            notice = '|rExtra Ticker|n - |yadditional|n '
-                            # TODO: Too many weather tickers going, maybe remove extra?
-                        channel = ChannelDB.objects.channel_search('MudInfo')
-                        if channel[0]:
-                            channel[0].msg('* %s\'s %s experience * %s%s' % (new_arrival.key, tick[4], notice, show),
-                                           keep_log=False)
-                if counter == 0:  # No weather ticker! Add a weather ticker.
-                    interval = random.randint(24, 60) * 10
-                    TICKER_HANDLER.add(interval=interval, callback=self.update_weather, idstring='Weather')
+                    WEATHER.show(self)  # The region's current weather on initial arrival.
             for obj in self.contents_get(exclude=new_arrival):
                 if hasattr(obj, 'at_new_arrival'):
                     obj.at_new_arrival(new_arrival)
 
-    def attempt_weather_update(self, odds):
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
         """
-        Called by update_weather
+        Called just before an object leaves this room.
+
         Args:
-            odds (float): 0 to 1 - odds of the weather changing.
+            moved_obj (Object): the object leaving.
+            target_location (Object): where moved_obj is going.
         """
-        weather = self.db.weather or (
-            "The rain coming down from the iron-grey sky intensifies.",
-            "A gust of wind throws the rain right in your face. Despite your cloak you shiver.",
-            "The rainfall eases a bit and the sky momentarily brightens.",
-            "For a moment it looks like the rain is slowing, then it begins anew with renewed force.",
-            "The rain pummels you with large, heavy drops. You hear the rumble of thunder in the distance.",
-            "The wind is picking up, howling around you, throwing water droplets in your face. It's cold.",
-            "Bright fingers of lightning flash over the sky, moments later followed by a deafening rumble.",
-            "It rains so hard you can hardly see your hand in front of you. You'll soon be drenched to the bone.",
-            "Lightning strikes in several thundering bolts, striking the trees in the forest to your west.",
-            "You hear the distant howl of what sounds like some sort of dog or wolf.",
-            "Large clouds rush across the sky, throwing their load of rain over the world.")
-        if random.random() >= odds:
-            return
-        new_weather = random.choice(weather)
-        if self.ndb.weather_last != new_weather:  # ... only update on a new weather condition.
-            self.msg_contents("|w%s|n" % new_weather)
-            self.ndb.weather_last = new_weather
-            self.ndb.weather_time = int(time.time())
+        super(Room, self).at_object_leave(moved_obj, target_location, **kwargs)
+        if moved_obj.destination:  # An exit was taken out of this room.
+            EXIT_GRAPH.invalidate(self)
 
     def update_weather(self, *args, **kwargs):
         """
-        Called by the tickerhandler at regular intervals. Even so, we
-        only update 15% of the time, picking a random weather message
-        when we do. The tickerhandler requires that this hook accepts
-        any arguments and keyword arguments (hence the *args, **kwargs
-        even though we don't actually use them in this example)
+        Callback of the old per-room weather tickers, kept so they can be
+        found and removed at server start. Weather is now updated by
+        region in world.weather.
         """
-        slow_room = True
-        empty_room = True
-        session_list = SESSIONS.get_sessions()
-        for session in session_list:
-            character = session.get_puppet()
-            if not session.logged_in or not character or character.location != self:
-                continue
-            empty_room = False
-            if session.cmd_last_visible > self.ndb.weather_time:
-                slow_room = False
-                break
-        if empty_room:
-            return
-        if slow_room:
-            self.attempt_weather_update(0.02)  # only attempt update 2% of the time
-        else:
-            self.attempt_weather_update(0.15)
+        WEATHER.register(self)
 
     @classmethod
     def get_room_at(cls, x, y, z):
         """
         Return the room at the given location or None if not found.
+        Uses the spatial index once it is built, else the database.
         Args:
             x (int): the X coord.
             y (int): the Y coord.
@@ -631,10 +580,14 @@ class Room(Tangible):
         Return:
             The room at this location (Room) or None if not found.
         """
-        rooms = cls.objects.filter(
-                db_tags__db_key=str(x), db_tags__db_category="coordx").filter(
-                db_tags__db_key=str(y), db_tags__db_category="coordy").filter(
-                db_tags__db_key=str(z), db_tags__db_category="coordz")
+        if SPATIAL_INDEX.ready:
+            return SPATIAL_INDEX.room_at(x, y, z)
+        return cls.get_room_at_tags(x, y, z)
+
+    @classmethod
+    def get_room_at_tags(cls, x, y, z):
+        """Database version of get_room_at, matching the packed coordinate tag."""
+        rooms = cls.objects.filter(db_tags__db_key=pack_coord(x, y, z), db_tags__db_category=COORD_CATEGORY)
         if rooms:
             return rooms[0]
 
@@ -643,10 +596,10 @@ class Room(Tangible):
     def get_rooms_near(self, distance):
         """A shortcut into get_rooms_around that is
          some distance from this room."""
-        x = int(self.tags.get(category="coordx"))
-        y = int(self.tags.get(category="coordy"))
-        z = int(self.tags.get(category="coordz"))
-        return self.get_rooms_around(x, y, z, distance)
+        position = SPATIAL_INDEX.position(self) or self.coord
+        if not position:
+            return []
+        return self.get_rooms_around(position[0], position[1], position[2], distance)
 
     @classmethod
     def get_rooms_around(cls, x, y, z, distance):
@@ -665,73 +618,97 @@ class Room(Tangible):
             position and the room at this distance.  Several rooms
             can be at equal distance from the position.
         """
-        # Performs a quick search to only get rooms in a kind of rectangle
-        x_r = list(reversed([str(x - i) for i in range(0, distance + 1)]))
-        x_r += [str(x + i) for i in range(1, distance + 1)]
-        y_r = list(reversed([str(y - i) for i in range(0, distance + 1)]))
-        y_r += [str(y + i) for i in range(1, distance + 1)]
-        z_r = list(reversed([str(z - i) for i in range(0, distance + 1)]))
-        z_r += [str(z + i) for i in range(1, distance + 1)]
-        wide = cls.objects.filter(
-                db_tags__db_key__in=x_r, db_tags__db_category="coordx").filter(
-                db_tags__db_key__in=y_r, db_tags__db_category="coordy").filter(
-                db_tags__db_key__in=z_r, db_tags__db_category="coordz")
-
-        # We now need to filter down this list to find out whether
-        # these rooms are really close enough, and at what distance
-        rooms = []
-        for room in wide:
-            x2 = int(room.tags.get(category="coordx"))
-            y2 = int(room.tags.get(category="coordy"))
-            z2 = int(room.tags.get(category="coordz"))
-            distance_to_room = sqrt(
-                    (x2 - x) ** 2 + (y2 - y) ** 2 + (z2 - z) ** 2)
-            if distance_to_room <= distance:
-                rooms.append((distance_to_room, room))
+        if SPATIAL_INDEX.ready:
+            return SPATIAL_INDEX.rooms_around(x, y, z, distance)
+        return cls.get_rooms_around_tags(x, y, z, distance)
 
-        # Finally sort the rooms by distance
+    @classmethod
+    def get_rooms_around_tags(cls, x, y, z, distance):
+        """Database version of get_rooms_around, as one range query on the packed coordinate tag."""
+        # Packed keys sort by x first, so the range holds the slab of x within distance.
+        low = pack_coord(x - distance, y - distance, z - distance)
+        high = pack_coord(x + distance, y + distance, z + distance)
+        tags = Tag.objects.filter(db_category=COORD_CATEGORY, db_key__range=(low, high),
+                                  objectdb__isnull=False).values_list('db_key', 'objectdb')
+        near = {}
+        for key, room_id in tags:
+            x2, y2, z2 = unpack_coord(key)
+            distance_to_room = sqrt((x2 - x) ** 2 + (y2 - y) ** 2 + (z2 - z) ** 2)
+            if distance_to_room <= distance:
+                near[room_id] = distance_to_room
+        # We now fetch the rooms that are really close enough, and sort them by distance
+        rooms = [(near[room.id], room) for room in ObjectDB.objects.filter(id__in=near.keys())]
         rooms.sort(key=lambda tup: tup[0])
         return rooms
 
+    def _get_coord(self):
+        """Return the (x, y, z) coordinate tuple or None."""
+        packed = self.tags.get(category=COORD_CATEGORY)
+        if isinstance(packed, basestring):
+            return unpack_coord(packed)
+        legacy = [self.tags.get(category=axis) for axis in LEGACY_CATEGORIES]  # Not yet migrated
+        if all(isinstance(each, basestring) for each in legacy):
+            return tuple(int(each) for each in legacy)
+        return None
+
+    def _set_coord(self, coord):
+        """Change the coordinates, as one packed tag. None removes them."""
+        old = self.tags.get(category=COORD_CATEGORY)
+        if old is not None:
+            self.tags.remove(old, category=COORD_CATEGORY)
+        for axis in LEGACY_CATEGORIES:
+            legacy = self.tags.get(category=axis)
+            if legacy is not None:
+                self.tags.remove(legacy, category=axis)
+        if coord is not None:
+            self.tags.add(pack_coord(*coord), category=COORD_CATEGORY)
+        SPATIAL_INDEX.add(self, coord)
+    coord = property(_get_coord, _set_coord)
+
+    def _set_axis(self, axis, value):
+        """Change one coordinate, treating unset coordinates as 0."""
+        coord = list(self.coord or (0, 0, 0))
+        coord[axis] = int(value)
+        self.coord = tuple(coord)
+
     def _get_x(self):
         """Return the X coordinate or None."""
-        x = self.tags.get(category="coordx")
-        return int(x) if isinstance(x, str) else None
+        coord = self.coord
+        return coord[0] if coord else None
 
     def _set_x(self, x):
         """Change the X coordinate."""
-        old = self.tags.get(category="coordx")
-        if old is not None:
-            self.tags.remove(old, category="coordx")
-        self.tags.add(str(x), category="coordx")
+        self._set_axis(0, x)
     x = property(_get_x, _set_x)
 
     def _get_y(self):
         """Return the Y coordinate or None."""
-        y = self.tags.get(category="coordy")
-        return int(y) if isinstance(y, str) else None
+        coord = self.coord
+        return coord[1] if coord else None
 
     def _set_y(self, y):
         """Change the Y coordinate."""
-        old = self.tags.get(category="coordy")
-        if old is not None:
-            self.tags.remove(old, category="coordy")
-        self.tags.add(str(y), category="coordy")
+        self._set_axis(1, y)
     y = property(_get_y, _set_y)
 
     def _get_z(self):
         """Return the Z coordinate or None."""
-        z = self.tags.get(category="coordz")
-        return int(z) if isinstance(z, str) else None
+        coord = self.coord
+        return coord[2] if coord else None
 
     def _set_z(self, z):
         """Change the Z coordinate."""
-        old = self.tags.get(category="coordz")
-        if old is not None:
-            self.tags.remove(old, category="coordz")
-        self.tags.add(str(z), category="coordz")
+        self._set_axis(2, z)
     z = property(_get_z, _set_z)
 
+    def at_object_delete(self):
+        """Called just before deleting the room. Drops it from the spatial index, exit graph and weather."""
+        SPATIAL_INDEX.remove(self)
+        EXIT_GRAPH.invalidate(self)
+        WEATHER.remove(self)
+        _APPEARANCE.pop(self, None)
+        return super(Room, self).at_object_delete()
+
 
 class RealmEntry(Room):
     """
@@ -828,18 +805,16 @@ class CmdGridMotion(default_cmds.MuxCommand):
             new = '%s @ %r' % (loc.get_display_name(you, mxp='sense here'), coord)
         # Check for riders/followers to bring them along
         # If rider/follower, add to lists. Riders move with mounts; followers move later
-        # r_list = you.db.riders if you.db.riders and len(you.db.riders) > 0 else False  # FIXME temporary hack
-        f_list = you.db.followers if you.db.followers and len(you.db.followers) > 0 else False
-        r_list = f_list  # <- FIXME temporary hack (Remove this line when updated)
+        r_list = GROUPS.riders_of(you)
+        f_list = GROUPS.followers_of(you)
         riders, followers = [], []
         if r_list:
+            with_you = loc.cell_contents.at(last)  # Those in your cell ride with you
             for each in r_list:
-                if each.location != loc:
-                    continue
-                if each.ndb.grid_loc == last and each not in riders:
+                if each in with_you and each not in riders:
                     riders.append(each)  # Add this one to the list, it will ride with you
-                    loc.point(coord, each, now)  # Apply timestamp
-                    each.ndb.grid_loc = coord  # Mark location on moving object's followers/riders
+                    loc.trails.stamp(each, coord, now)  # Apply timestamp
+                    loc.place(each, coord)  # Mark location on moving object's followers/riders
         if len(riders) > 0:
             bringing = ", ".join(each.get_display_name(you) for each in riders)
             loc.msg_contents('{you} takes %s |g%s|n from %s to %s.'
@@ -847,8 +822,8 @@ class CmdGridMotion(default_cmds.MuxCommand):
         else:
             loc.msg_contents('{you} moves |g%s|n from %s to %s.'
                              % (self.key, name, new), from_obj=you, mapping=dict(you=you))
-        loc.point(coord, you, now)  # Apply timestamp
-        you.ndb.grid_loc = coord  # Mark location on moving object and its riders
+        loc.trails.stamp(you, coord, now)  # Apply timestamp
+        loc.place(you, coord)  # Mark location on moving object and its riders
         you.msg(you.at_look(you.location))
         if r_list:  # All the riders look upon arrival
             for each in riders:
@@ -890,6 +865,7 @@ class CmdGrid(CmdGridMotion):
     /current <[x, y]>                  Show or edit the current working location in the room.
     /large                             Show a large grid to represent the grid room layout.
     /small                             Show a small grid to represent the grid room layout.
+    /map [radius]                      Show the grid around you, [radius] cells each way.
     """
     key = 'grid'
     help_category = 'Building'
@@ -963,21 +939,12 @@ class CmdGrid(CmdGridMotion):
         if small or 'large' in self.switches:
             intro = 'Small' if small else 'Large'
             you.msg('%s grid display of room:|/' % intro)
-            for i in range(min[1], max[1] + 1):
-                line_list = []
-                if small:
-                    for j in range(min[1], max[1] + 1):
-                        line_list.append(' x ' if x == j and y == i else ' . ')
-                    you.msg(''.join(line_list) + '|/')
-                else:
-                    for k in range(0, 2):
-                        for j in range(min[0], max[0] + 1):
-                            if k == 0:
-                                line_list.append('[ _ ] ' if x == j and y == i else '[   ] ')
-                            else:
-                                line_list.append('[___] ' if x == j and y == i else '[___] ')
-                        line_list.append('|/')
-                    you.msg(''.join(line_list))
+            rows = minimap.render(loc, current, viewer=you, glyphs=minimap.SMALL if small else minimap.LARGE,
+                                  box=(min, max))
+            you.msg('|/'.join(rows))
+        if 'map' in self.switches:
+            radius = int(self.args) if self.args.strip().isdigit() else minimap.RADIUS
+            you.msg('|/'.join(minimap.render(loc, you.ndb.grid_loc or current, radius, viewer=you)))
         coord = loc.grid('current')
         if 'name' in self.switches:
             if self.args:
@@ -1044,7 +1011,7 @@ class CmdGrid(CmdGridMotion):
                 return
             if 'there' in self.switches:
                 if here:
-                    you.ndb.grid_loc = there
+                    loc.place(you, there)
                     name = '%s - %s' % (loc.get_display_name(you), loc.point(here, 'name'))
                     you.msg('|yYou have been moved to Current edit location at %s|w @ %r' % (name, coord))
                 else:
@@ -1144,10 +1111,11 @@ class Grid(Room):
             return super(Grid, self).return_appearance(viewer)
         else:
             name = '%s - %s' % (self.get_display_name(viewer, mxp='sense here'), name)
+        in_cell = self.cell_contents.at(coord)
         visible = [element for element in self.contents if element != viewer and not element.destination
                    and element.access(viewer, 'view')]
-        here = [element for element in visible if element.ndb.grid_loc == coord]
-        there = [element for element in visible if element not in here]
+        here = [element for element in visible if element in in_cell]
+        there = [element for element in visible if element not in in_cell]
         # Contents you can see.  Show here, and then show there (with names).
         overdesc = (self.db.desc if self.db.desc else '') or (self.db.desc_brief if self.db.desc_brief else '')
         result = ['|/|y%s|n%s%s' % (name, '\n{}\n'.format(overdesc) if overdesc else overdesc, desc or '')]
@@ -1157,6 +1125,8 @@ class Grid(Room):
         if there:
             there_list = ", ".join(each.get_display_name(viewer, pose=True) for each in there).replace('.,', ';')
             result.append('|/Elsewhere: %s' % there_list)  # If something there can be seen, list it
+        if self.tags.get('minimap', category='flags'):  # Show the grid around the viewer
+            result.append('|/' + '|/'.join(minimap.render(self, coord, viewer=viewer)))
         return ''.join(result)
 
     def grid(self, key=None, value=None, **kwargs):
@@ -1181,26 +1151,51 @@ class Grid(Room):
                 results = self.db.grid.get(key, None)
         return results
 
+    @lazy_property
+    def cells(self):
+        """Chunked store of this grid's cells."""
+        return CellStore(self)
+
+    @lazy_property
+    def trails(self):
+        """Latest stamps of each traveller on this grid."""
+        return TrailStore(self)
+
+    @lazy_property
+    def cell_contents(self):
+        """Objects in this grid by the cell they are in."""
+        return CellContents(self)
+
+    def place(self, obj, coord):
+        """Put obj in this grid's cell at coord."""
+        obj.ndb.grid_loc = tuple(coord)
+        self.cell_contents.place(obj, coord)
+        ACCESS.clear()  # on_exit locks read the cell
+
     def point(self, loc, key=None, value=None, **kwargs):
-        """TODO: Docstring here."""
+        """
+        Read or write an entry of the grid cell at loc, kept in the
+        chunked cell store.
+        Args:
+            loc (tuple): (x, y) coordinate of the cell.
+            key (str or Object): entry to read or write, or None to read the whole cell.
+            value: written to the entry when set.
+        Kwargs:
+            push (bool): append value to a list entry instead of replacing it.
+            pop (bool): remove the entry instead of writing it.
+        Returns:
+            The entry read, or the whole cell when key is None or after a write.
+        """
         push, pop = [kwargs.get('push', False), kwargs.get('pop', False)]  # Read kwargs, set defaults.
-        entries = self.grid(loc) or {}
         if value:  # Writing an entry.
             if pop:  # Deleting the entry
-                entries.pop(key, None)  # popped from entries
-            else:  # Add or push the entry given
-                if push:  # Pushing an entry into a list
-                    if not entries[key]:  # Is this entry empty?
-                        entries[key] = []  # initialize new list
-                    entries[key].append(value)  # Append entries to list
-                else:
-                    if entries is None:  # Is this entry empty?
-                        entries = {}  # If so, start with a blank dictionary
-                    entries[key] = value
-            self.grid(loc, entries)  # Write all entries for loc back to grid.
-            return entries  # Return all loc entries, which could be useful.
-        else:  # Reading an entry.
-            return entries.get(key, None) if key else entries  # return requested entry or all entries
+                self.cells.pop(loc, key)
+            elif push:  # Pushing an entry into a list
+                self.cells.set(loc, key, list(self.cells.get(loc, key) or []) + [value])
+            else:
+                self.cells.set(loc, key, value)
+            return self.cells.get(loc)  # Return all loc entries, which could be useful.
+        return self.cells.get(loc, key)  # return requested entry or all entries
 
     def stamps(self, traveller=None):
         """
@@ -1210,20 +1205,13 @@ class Grid(Room):
         were not visited) can be determined.
 
         Returns:
-            tuple of coordinates and timestamps, latest to oldest.
-            If traveller is None, return all timestamps. TODO
+            list of (coordinate, timestamp), latest to oldest.
+            If traveller is None, return the stamps of all travellers.
             If traveller is not found, return an empty list []
         """
-        if traveller is None:
-            return 'TODO'
-        gather = []
-        grid = self.db.grid
-        for each in grid.keys():
-            if each in ('min', 'max', 'current', 'base'):
-                continue
-            for every in grid[each]:
-                if every is traveller:
-                    gather.append((each, grid[each][traveller]))
+        if traveller is not None:
+            return self.trails.stamps(traveller)
+        gather = [stamp for each in self.trails.travellers() for stamp in self.trails.stamps(each)]
         return sorted(gather, key=lambda tup: tup[1], reverse=True)
 
     def last_at(self, traveller):
@@ -1231,11 +1219,11 @@ class Grid(Room):
         Which grid coordinate the traveller last occupied, or
         traveller is set to be at grid base coordinate.
         """
-        trail = self.stamps(traveller)
-        if not traveller.ndb.grid_loc and not trail:
-            traveller.ndb.grid_loc = self.grid('base')
+        last = self.trails.last(traveller)
+        if not traveller.ndb.grid_loc and not last:
+            self.place(traveller, self.grid('base'))
             return self.grid('base')
-        return trail[0][0] if trail else self.grid('base')
+        return last[0] if last else self.grid('base')
 
     def at_object_receive(self, new_arrival, source_location):
         """
@@ -1250,9 +1238,35 @@ class Grid(Room):
             source_location (Object): the previous location of new_arrival.
         """
         super(Grid, self).at_object_receive(new_arrival, source_location)
-        self.last_at(new_arrival)
+        if source_location and source_location.location == self and source_location.ndb.grid_loc:
+            coord = source_location.ndb.grid_loc  # Dropped, so in the cell of whoever dropped it
+        else:
+            coord = new_arrival.ndb.grid_loc or self.last_at(new_arrival)
+        self.place(new_arrival, coord)
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        """Called just before an object leaves the grid. It leaves its cell too."""
+        super(Grid, self).at_object_leave(moved_obj, target_location, **kwargs)
+        self.cell_contents.remove(moved_obj)
+
+    def at_init(self):
+        """Called when the grid is loaded into memory. Restores where objects in it were."""
+        super(Grid, self).at_init()
+        self.cell_contents  # Loading the index restores grid_loc of objects placed before a reload
 
     def at_object_creation(self):
         """called when the object is first created"""
         self.cmdset.add_default(CmdSetGridRoom)
         self.grid(base=(0, 0), current=(0, 0), min=(0, 0), max=(0, 0))  # Make default 1 x 1 room
+
+    def at_object_delete(self):
+        """Called just before deleting the grid. Unsaved cell, trail and contents changes and its map are dropped."""
+        minimap.forget(self)
+        loaded = self.__dict__  # Lazy properties already loaded; loading a store now would write to the room.
+        if 'cells' in loaded:
+            loaded['cells'].dirty.clear()
+        if 'trails' in loaded:
+            loaded['trails'].dirty = False
+        if 'cell_contents' in loaded:
+            loaded['cell_contents'].dirty = False
+        return super(Grid, self).at_object_delete()
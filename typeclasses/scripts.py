@@ -89,3 +89,50 @@ class Script(DefaultScript):
 
     """
     pass
+
+
+class RoutingScript(Script):
+    """
+    Keeps the zone next-hop routing tables in world.routing current.
+    Builds every zone's table at start, then once every interval picks up
+    changed zone membership and rebuilds only zones whose exits or rooms
+    changed. Building runs cooperatively in the reactor.
+    """
+
+    def at_script_creation(self):
+        self.key = 'routing'
+        self.desc = 'Rebuilds zone routing tables'
+        self.interval = 60
+        self.persistent = True
+
+    def at_start(self):
+        from world.routing import ROUTES
+        ROUTES.refresh()
+
+    def at_repeat(self):
+        from world.routing import ROUTES
+        ROUTES.refresh()
+
+
+class WeatherScript(Script):
+    """
+    Drives the weather scheduler in world.weather, updating the
+    weather regions that are due every interval, and keeps the
+    regions' state in its `regions` attribute.
+    """
+
+    def at_script_creation(self):
+        self.key = 'weather'
+        self.desc = 'Updates weather in occupied rooms'
+        self.interval = 10
+        self.persistent = True
+
+    def at_start(self):
+        from world.weather import WEATHER
+        WEATHER.load(self.db.regions)
+
+    def at_repeat(self):
+        from world.weather import WEATHER
+        WEATHER.tick()
+        if WEATHER.changed:
+            self.db.regions = WEATHER.save()
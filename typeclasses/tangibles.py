@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 from evennia import DefaultObject
-from evennia.utils import inherits_from
 from evennia.utils.utils import lazy_property
 from typeclasses.traits import TraitHandler
-from functools import reduce
+from world.visits import VisitLog
+from world.mass import MassTotals
+from world.render import RENDER, resolve_viewer
+from world.access import ACCESS
+from world.verbindex import VERBS
+from world.speechnames import SPEECH_NAMES
+from world.groups import GROUPS
+from world.occupancy import OCCUPANCY
 import time  # Check time since last visit
 
 
@@ -22,6 +28,14 @@ class Tangible(DefaultObject):
     def traits(self):
         return TraitHandler(self)
 
+    @lazy_property
+    def visits(self):
+        return VisitLog(self)
+
+    @lazy_property
+    def masses(self):
+        return MassTotals(self)
+
     def at_object_receive(self, new_arrival, source_location):
         """
         When an object enters another.
@@ -30,16 +44,54 @@ class Tangible(DefaultObject):
             new_arrival (Object): the object that just entered this room.
             source_location (Object): the previous location of new_arrival.
         """
-        # Add object to "hosted" attribute dictionary on self, keyed by object.
-        # Value is (timestamp, source_location, visit_count)
-        now = int(time.time())
-        last_entry = (self.db.hosted and self.db.hosted.get(new_arrival)) or (now, source_location, 0)
-        visit_count = (last_entry[2] + 1)
-        new_arrival.ndb.last_visit = (last_entry[0], source_location)
-        if self.db.hosted:
-            self.db.hosted[new_arrival] = (now, source_location, visit_count)
-        else:
-            self.db.hosted = {new_arrival: (now, source_location, visit_count)}
+        # Log the visit: (visitor, timestamp, source_location, visit_count) row kept per visitor.
+        last_time = self.visits.record(new_arrival, source_location, int(time.time()))
+        new_arrival.ndb.last_visit = (last_time, source_location)
+        self.masses.add(new_arrival)
+        VERBS.forget(self)
+        SPEECH_NAMES.forget(self)
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        """Called just before an object leaves from inside this object. Its mass goes with it."""
+        self.masses.remove(moved_obj)
+        VERBS.forget(self)
+        SPEECH_NAMES.forget(self)
+        super(Tangible, self).at_object_leave(moved_obj, target_location, **kwargs)
+
+    def at_object_delete(self):
+        """
+        Called just before deleting the object. Takes it out of any group it
+        is in and off its holder's mass, and drops its occupancy counts.
+        """
+        GROUPS.forget(self)
+        OCCUPANCY.forget(self)
+        if self.location and hasattr(self.location, 'masses'):
+            self.location.masses.remove(self)
+        return True
+
+    def leave_location(self):
+        """Take the object out of its location to nowhere, as the location's leave hook sees a move."""
+        holder = self.location
+        if holder is not None:
+            holder.at_object_leave(self, None)
+            self.location = None
+
+    def at_trait_change(self, key):
+        """Called by the TraitHandler when trait key changes value."""
+        if key == 'mass':
+            self.masses.refresh()
+
+    def access(self, accessing_obj, access_type='read', default=False, no_superuser_bypass=False, **kwargs):
+        """
+        Lock check as DefaultObject.access, with the result kept for the rest of
+        the command when called without extra arguments.
+        """
+        def evaluate():
+            return super(Tangible, self).access(accessing_obj, access_type=access_type, default=default,
+                                                no_superuser_bypass=no_superuser_bypass, **kwargs)
+        if kwargs or default or no_superuser_bypass:
+            return evaluate()
+        return ACCESS.check(self, accessing_obj, access_type, evaluate)
 
     def get_display_name(self, viewer, **kwargs):
         """
@@ -60,11 +112,21 @@ class Tangible(DefaultObject):
             if this is defined.
                 including the DBREF if viewer is privileged to control this.
         """
+        context = RENDER.current()
+        if context:
+            return context.name(self, viewer, kwargs)
+        viewer, quelled = resolve_viewer(viewer)
+        return self.display_name_for(viewer, quelled, **kwargs)
+
+    def display_name_for(self, viewer, quelled, **kwargs):
+        """
+        The name of the object seen by a resolved viewer, as get_display_name.
+
+        Args:
+            viewer (Tangible): Viewer resolved by world.render.resolve_viewer.
+            quelled (bool): True if viewer's account is quelled.
+        """
         name = self.key
-        if not viewer:
-            viewer = viewer.get_puppet_or_account
-        if inherits_from(viewer, "evennia.accounts.accounts.DefaultAccount"):
-            viewer = viewer.get_puppet(viewer.sessions.all()[0])  # viewer is an Account, convert to tangible
         if not (viewer and viewer.has_account):
             return '{}{}|n'.format(self.STYLE, name)
         color, pose = [kwargs.get('color', True), kwargs.get('pose', False)]  # Read kwargs, set defaults.
@@ -74,19 +136,16 @@ class Tangible(DefaultObject):
         display_name = ("%s%s|n" % (self.STYLE, name)) if color else name
         if mxp:
             display_name = "|lc%s|lt%s|le" % (mxp, display_name)
-        if not viewer.account.attributes.has('_quell') and self.access(viewer, access_type='control') and db_id:
+        if db_id and not quelled and self.access(viewer, access_type='control'):
             display_name += '|w(#%s)|n' % self.id
-        if pose and self.db.messages and (self.db.messages.get('pose') or self.db.messages.get('pose_default')):
-            display_pose = self.db.messages.get('pose') if self.db.messages.get('pose', None)\
-                else self.db.messages.get('pose_default')
+        messages = self.db.messages if pose else None
+        display_pose = messages and (messages.get('pose') or messages.get('pose_default'))
+        if display_pose:
             display_name += ('|n' if color else '') + display_pose
         return display_name
 
     def get_mass(self):
-        mass = self.traits.mass.actual if self.traits.mass else 0
-        if mass <= 0 and self.tags.get('weightless', category='flags'):
-            return mass  # Ignore mass of contents if this tangible is weight-free or inert.
-        return reduce(lambda x, y: x+y.get_mass() if hasattr(y, 'get_mass') else 0, [mass] + self.contents)
+        return self.masses.total()  # Contents ignored if this tangible is weight-free or inert.
 
     def get_limit(self):
         # TODO: Apply health as a small factor.
@@ -114,7 +173,7 @@ class Tangible(DefaultObject):
             message += text
         self.msg(message)
 
-    def return_glance(self, viewer, bool=False, oob=False):
+    def return_glance(self, viewer, bool=False, oob=False, quiet=False):
         """
         Displays the name or sdesc of the object with its room pose in a viewer-aware manner.
         If self is in Nothingness, shows inventory contents instead of room contents.
@@ -125,6 +184,7 @@ class Tangible(DefaultObject):
                 at/getting information for this object.
             bool (bool): Return True instead of a string list.
             oob (bool): Include viewer as if out of body.
+            quiet (bool): Return an empty string when nothing is seen.
 
         Returns:
             name (str): A string of the name or sdesc containing the name of the objects
@@ -144,18 +204,20 @@ class Tangible(DefaultObject):
             else:
                 things.append(con)
         if users or things:
+            if bool:
+                return True
             user_list = ", ".join(u.get_display_name(viewer, mxp='sense %s' % u.get_display_name(
                 viewer, plain=True), pose=True) for u in users)
             ut_joiner = ', ' if users and things else ''
             item_list = ", ".join(t.get_display_name(viewer, mxp='sense %s' % t.get_display_name(
                 viewer, plain=True), pose=True) for t in things)
-            if bool:
-                return True
             glance_result = ((user_list + ut_joiner + item_list).replace('\n', '').replace('.,', ';'))
             end_character = '' if glance_result[-1:] in ('.', '!', '?', ';', ':') else '.'
             return glance_result + end_character
         if bool:
             return False
+        if quiet:
+            return ''
         # See your own pose if OOB mode, else there's nothing here except you.
         return viewer.get_display_name(viewer, pose=True) if oob else '%sYou|n see no items here.' % viewer.STYLE
 
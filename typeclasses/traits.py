@@ -254,6 +254,7 @@ class TraitHandler(object):
 
         self.attr_dict = obj.attributes.get(db_attribute)
         self.cache = {}
+        self.obj = obj
 
     def __len__(self):
         """Return number of Traits in 'attr_dict'."""
@@ -261,7 +262,7 @@ class TraitHandler(object):
 
     def __setattr__(self, key, value):
         """Returns error message if trait objects are assigned directly."""
-        if key in ('attr_dict', 'cache'):
+        if key in ('attr_dict', 'cache', 'obj'):
             super(TraitHandler, self).__setattr__(key, value)
         else:
             raise TraitException(
@@ -299,6 +300,8 @@ class TraitHandler(object):
                 return None
             data = self.attr_dict[trait]
             self.cache[trait] = Trait(data)
+            if hasattr(self.obj, 'at_trait_change'):
+                self.cache[trait].__dict__['_changed'] = lambda: self.obj.at_trait_change(trait)
         return self.cache[trait]
 
     def add(self, key, name, trait_type='static', base=0, mod=0, min=None, max=None, extra=None):
@@ -322,6 +325,7 @@ class TraitHandler(object):
                 trait.update(dict(max=max))
 
             self.attr_dict[key] = trait
+            self._changed(key)
         else:
             raise TraitException("Invalid trait type specified.")
 
@@ -333,6 +337,7 @@ class TraitHandler(object):
         if trait in self.cache:
             del self.cache[trait]
         del self.attr_dict[trait]
+        self._changed(trait)
 
     def clear(self):
         """Remove all Traits from the handler's parent object."""
@@ -344,6 +349,11 @@ class TraitHandler(object):
         """Return a list of all trait keys in this TraitHandler."""
         return self.attr_dict.keys()
 
+    def _changed(self, trait):
+        """Tell the parent object, if it wants to know, that trait changed."""
+        if hasattr(self.obj, 'at_trait_change'):
+            self.obj.at_trait_change(trait)
+
 
 @total_ordering
 class Trait(object):
@@ -579,6 +589,7 @@ class Trait(object):
             self._data['base'] = amount
         if type(amount) in (int, float):
             self._data['base'] = self._enforce_bounds(amount)
+        self._notify()
 
     @property
     def mod(self):
@@ -597,6 +608,7 @@ class Trait(object):
                 else:
                     # but not decreases, unless current goes out of range
                     self.current = self._enforce_bounds(self.current)
+            self._notify()
 
     @property
     def min(self):
@@ -660,6 +672,7 @@ class Trait(object):
         if self._type in RANGE_TRAITS:
             if type(value) in (int, float):
                 self._data['current'] = self._enforce_bounds(value)
+                self._notify()
         else:
             raise AttributeError(
                 "'current' property is read-only on static 'Trait'.")
@@ -701,6 +714,12 @@ class Trait(object):
 
     # Private members
 
+    def _notify(self):
+        """Call the change hook set by the TraitHandler, if any."""
+        changed = self.__dict__.get('_changed')
+        if changed:
+            changed()
+
     def _mod_base(self):
         return self._enforce_bounds(self.mod + self.base)
 
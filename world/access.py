@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Access cache
+
+Results of lock checks kept for the length of one command, keyed by
+(accessing object, accessed object, access type). The look and glance
+paths check `view` on every object in a room, and custom lockfuncs such
+as `rp`, `on_exit` and `at_home` read attributes and tags each time;
+within one command the answer does not change unless something moves or
+a lock or permission is edited.
+
+MuxCommand runs each command's func inside a scope, ended in a finally
+clause even when func raises; the movement scheduler scopes each batch
+of arrivals the same way. A scope older than MAX_AGE counts as ended.
+Outside a scope every check is evaluated as before. The kept results are dropped whenever an
+object or account is saved (a move, a lock edit), has its tags changed
+(permissions and flags), or is deleted, by the database signals
+connected at server start with `ACCESS.connect()`, and when an object
+moves within a grid room. Locks using lockfuncs with a random answer
+(UNCACHED) are never kept.
+
+`ACCESS.report()` gives the hit rate and an estimate of the time saved,
+counted since the server started.
+"""
+import time
+
+MAX_AGE = 2  # Seconds a scope keeps results before they are dropped
+UNCACHED = ('half(', 'roll(')  # Lockfuncs whose answer may differ each time
+
+
+class AccessCache(object):
+    """Lock check results within the command running now."""
+
+    def __init__(self):
+        self.results = {}  # (accessing, accessed, access type): result
+        self.started = 0
+        self.depth = 0
+        self.hits = self.misses = self.clears = 0
+        self.miss_seconds = 0.0  # Time spent evaluating checks not kept
+
+    def active(self):
+        """True while a scope runs. A scope past MAX_AGE is ended instead."""
+        if self.depth and time.time() - self.started >= MAX_AGE:
+            self.results, self.depth = {}, 0
+        return bool(self.depth)
+
+    def begin(self):
+        """A command or tick starts: keep results until it ends, sharing any running scope."""
+        if not self.active():
+            self.results, self.started = {}, time.time()
+        self.depth += 1
+
+    def end(self):
+        """A command or tick finished: drop its results unless inside another scope."""
+        self.depth = max(0, self.depth - 1)
+        if not self.depth:
+            self.results = {}
+
+    def clear(self, *args, **kwargs):
+        """Drop every kept result. Also the receiver of tag changes."""
+        if self.results:
+            self.results = {}
+            self.clears += 1
+
+    def changed(self, sender, instance, **kwargs):
+        """Receiver for saves and deletes: drop kept results when an object or account changed."""
+        from evennia.accounts.models import AccountDB
+        from evennia.objects.models import ObjectDB
+        if isinstance(instance, (ObjectDB, AccountDB)):
+            self.clear()
+
+    def check(self, accessed, accessing, access_type, evaluate):
+        """
+        Result of accessing's access_type check on accessed, kept within a scope.
+        Args:
+            evaluate (callable): Evaluates the check when no result is kept.
+        """
+        if not self.active():
+            return evaluate()
+        key = (accessing, accessed, access_type)
+        result = self.results.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        start = time.time()
+        result = evaluate()
+        self.miss_seconds += time.time() - start
+        self.misses += 1
+        if not any(func in (accessed.lock_storage or '') for func in UNCACHED):
+            self.results[key] = result
+        return result
+
+    def saved(self):
+        """Estimated seconds saved: hits times the average cost of an evaluated check."""
+        return self.hits * self.miss_seconds / self.misses if self.misses else 0.0
+
+    def report(self):
+        """Hit rate and time saved, as a short string."""
+        checks = self.hits + self.misses
+        rate = 100.0 * self.hits / checks if checks else 0.0
+        return 'Access cache: %i checks, %.1f%% kept results, about %.4fs saved, %i clears.' % (
+            checks, rate, self.saved(), self.clears)
+
+    def connect(self):
+        """Connect the receivers that drop kept results."""
+        from django.db.models.signals import m2m_changed, post_delete, post_save
+        from evennia.accounts.models import AccountDB
+        from evennia.objects.models import ObjectDB
+        # Saves and deletes are sent by each typeclass, a proxy of its model, so are not filtered by sender.
+        post_save.connect(self.changed, dispatch_uid='access_saved')
+        post_delete.connect(self.changed, dispatch_uid='access_deleted')
+        for model in (ObjectDB, AccountDB):
+            m2m_changed.connect(self.clear, sender=model.db_tags.through, dispatch_uid='access_tags_' + model.__name__)
+
+
+ACCESS = AccessCache()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Announcements
+
+Messages naming several objects, sent to everyone in a room. The
+message is built once as a template. Each viewer gets a signature, the
+things Tangible.display_name_for looks at when naming the objects: no
+account, or which of the names carry a dbref for it. The names and the
+text are worked out by display_name_for once per signature, for the
+first viewer with it, and every viewer is sent its text by one fan-out
+call. Within a command, viewers come resolved from the command's render
+context.
+
+    Announcement('|r{0}|n is leaving {1}.', [(self, dict(color=False)), (here, {})]).send(here.contents,
+                                                                                          exclude=self)
+"""
+from world.render import RENDER, resolve_viewer
+
+
+class Announcement(object):
+    """A message template, and the objects named in it."""
+
+    def __init__(self, template, names):
+        """
+        Args:
+            template (str): str.format template with {0}, {1}, ... for each of names.
+            names (list): (object, kwargs) for each name, kwargs as for get_display_name.
+        """
+        self.template = template
+        self.names = [(obj, kwargs, kwargs.get('db_id', True) and not kwargs.get('plain', False))
+                      for obj, kwargs in names]  # (object, kwargs, whether a dbref may be shown)
+        self.rendered = {}  # signature: text
+
+    @staticmethod
+    def resolve(viewer):
+        """(viewer, quelled) as resolve_viewer, from the render context when there is one."""
+        context = RENDER.current()
+        return context.viewer(viewer) if context else resolve_viewer(viewer)
+
+    def signature(self, viewer):
+        """Which form of each name viewer sees: None for objects without an account, else dbref flags."""
+        viewer, quelled = self.resolve(viewer)
+        if not (viewer and viewer.has_account):
+            return None
+        return tuple(bool(db_id and not quelled and obj.access(viewer, access_type='control'))
+                     for obj, kwargs, db_id in self.names)
+
+    def render(self, signature, viewer):
+        """The text seen by viewers with signature, worked out for viewer, the first of them."""
+        text = self.rendered.get(signature)
+        if text is None:
+            viewer, quelled = self.resolve(viewer)
+            names = [obj.display_name_for(viewer, quelled, **kwargs) for obj, kwargs, db_id in self.names]
+            text = self.rendered[signature] = self.template.format(*names)
+        return text
+
+    def send(self, viewers, exclude=None):
+        """Send the message to each of viewers but exclude. Returns the number of texts rendered."""
+        fan_out([(viewer, self.render(self.signature(viewer), viewer)) for viewer in viewers if viewer != exclude])
+        return len(self.rendered)
+
+
+def fan_out(deliveries):
+    """Send each (receiver, text) of deliveries."""
+    for receiver, text in deliveries:
+        receiver.msg(text)
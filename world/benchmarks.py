@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks
+
+Timing helpers for comparing the in-memory indexes with the database
+paths they replace. Run them in game from @py, for example:
+
+    @py from world.benchmarks import bench_coordinates; me.msg(bench_coordinates())
+
+Each function returns a short report string.
+"""
+import random
+import time
+
+
+def _timed(func, calls):
+    """Call each of calls (list of argument tuples) on func, returning seconds taken."""
+    start = time.time()
+    for args in calls:
+        func(*args)
+    return time.time() - start
+
+
+def _report(title, rows):
+    """Format (label, seconds, count) rows as a report."""
+    lines = ['|w%s|n' % title]
+    for label, seconds, count in rows:
+        rate = count / seconds if seconds else float('inf')
+        lines.append('  %-28s %8.4fs  %10.1f/s' % (label, seconds, rate))
+    return '|/'.join(lines)
+
+
+def bench_coordinates(samples=100, distance=3):
+    """
+    Compare the spatial index against the coordinate tag joins for
+    point lookups and radius searches around rooms already placed.
+    """
+    from typeclasses.rooms import Room
+    from world.spatial import SPATIAL_INDEX
+    if not SPATIAL_INDEX.ready:
+        SPATIAL_INDEX.rebuild()
+    positions = list(SPATIAL_INDEX.points.keys())
+    if not positions:
+        return 'No rooms with coordinates to benchmark.'
+    points = [random.choice(positions) for _ in range(samples)]
+    around = [point + (distance,) for point in points]
+    rows = [('index get_room_at', _timed(SPATIAL_INDEX.room_at, points), samples),
+            ('tags get_room_at', _timed(Room.get_room_at_tags, points), samples),
+            ('index get_rooms_around', _timed(SPATIAL_INDEX.rooms_around, around), samples),
+            ('tags get_rooms_around', _timed(Room.get_rooms_around_tags, around), samples)]
+    return _report('Coordinates: %i rooms, %i samples, distance %i' % (len(positions), samples, distance), rows)
+
+
+def synthetic_grid(side=100, wall_every=7):
+    """
+    A side x side world of rooms numbered by (x, y, 0), joined north, south,
+    east and west, with every wall_every-th column walled except one gap.
+    Returns:
+        (adjacency, positions) dictionaries usable as neighbours and position.
+    """
+    adjacency, positions = {}, {}
+    moves = (('n', 0, -1), ('s', 0, 1), ('e', 1, 0), ('w', -1, 0))
+    for x in range(side):
+        for y in range(side):
+            room = (x, y, 0)
+            positions[room] = room
+            ways = []
+            for way, dx, dy in moves:
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < side and 0 <= ny < side):
+                    continue
+                if dx and wall_every and max(x, nx) % wall_every == 0 and y != (x * 13) % side:
+                    continue  # Wall between columns, with one gap.
+                ways.append((way, (nx, ny, 0)))
+            adjacency[room] = tuple(ways)
+    return adjacency, positions
+
+
+def bench_pathfind(side=100, samples=20, budget=None):
+    """
+    Compare breadth-first and A* searches between random pairs of rooms
+    on a synthetic side x side grid (10,000 rooms by default).
+    """
+    from world.pathfind import astar, bfs
+    adjacency, positions = synthetic_grid(side)
+    budget = budget or side * side
+    rooms = list(adjacency)
+    pairs = [(random.choice(rooms), random.choice(rooms)) for _ in range(samples)]
+    neighbours = adjacency.__getitem__
+
+    def run(name, search):
+        routes = []
+        seconds = _timed(lambda start, goal: routes.append(search(start, goal)), pairs)
+        expanded = sum(route.expanded for route in routes)
+        return '%s (%i expanded)' % (name, expanded), seconds, samples
+
+    rows = [run('bfs', lambda start, goal: bfs(start, goal, neighbours, budget=budget)),
+            run('astar', lambda start, goal: astar(start, goal, neighbours, positions.get, budget=budget))]
+    return _report('Pathfinding: %i rooms, %i searches' % (len(rooms), samples), rows)
+
+
+def bench_look(viewer, looks=200, occupants=50):
+    """
+    Looks per second at the viewer's room, with and without the room
+    appearance cache. Temporary objects are added so the room holds
+    at least `occupants` things, and deleted afterward.
+    """
+    from evennia.utils import create
+    from typeclasses import rooms
+    room = viewer.location
+    if not room:
+        return 'The viewer must be in a room.'
+    extra = max(0, occupants - len(room.contents))
+    added = [create.create_object('typeclasses.objects.Object', key='bench %i' % i, location=room)
+             for i in range(extra)]
+    try:
+        calls = [(viewer,)] * looks
+        cached = _timed(room.return_appearance, calls)
+
+        def uncached(looker):
+            rooms._APPEARANCE.pop(room, None)
+            room.return_appearance(looker)
+        fresh = _timed(uncached, calls)
+    finally:
+        for obj in added:
+            obj.delete()
+    rows = [('cached look', cached, looks), ('uncached look', fresh, looks)]
+    return _report('Looks: %i occupants in %s' % (len(room.contents) + len(added), room.key), rows)
+
+
+def bench_grid_steps(side=100, steps=2000, whole_steps=20):
+    """
+    Grid steps per second on a temporary side x side Grid room with every
+    cell named, doing the cell reads and timestamp write of one step of
+    grid motion. Compared with saving the whole grid as one attribute per
+    write, as before the cells were chunked, for whole_steps steps.
+    """
+    from evennia.utils import create
+    room = create.create_object('typeclasses.rooms.Grid', key='bench grid')
+    try:
+        room.grid(min=(0, 0), max=(side - 1, side - 1))
+        for x in range(side):
+            for y in range(side):
+                room.cells.set((x, y), 'name', 'Cell %i,%i' % (x, y))
+        room.cells.flush()
+        walk = [((i % side, (i // side) % side), ((i + 1) % side, (i // side) % side)) for i in range(steps)]
+        whole = dict(room.cells.items())
+
+        def step(coord, bound):
+            room.point(bound, 'into')
+            room.point(bound, 'empty')
+            room.point(coord, 'name')
+            room.point(coord, 'desc')
+            room.point(bound, 'name')
+            room.point(bound, 'bench', int(time.time()))
+
+        def step_whole(coord, bound):
+            step(coord, bound)
+            whole[bound] = room.cells.get(bound)
+            room.attributes.add('bench whole', whole)
+
+        def step_flush(coord, bound):
+            step(coord, bound)
+            room.cells.flush()
+        rows = [('chunked, deferred save', _timed(step, walk), steps),
+                ('chunked, save each step', _timed(step_flush, walk), steps),
+                ('whole grid, save each step', _timed(step_whole, walk[:whole_steps]), whole_steps)]
+    finally:
+        room.delete()
+    return _report('Grid steps: %i x %i cells' % (side, side), rows)
+
+
+def bench_announce(viewer, populations=(10, 20, 40), party=5, moves=20):
+    """
+    Cost per move announcement against room population: a mover with
+    party - 1 riders announced to rooms of each population, as one
+    template rendered per kind of viewer, and as the display names
+    worked out for every viewer. The viewer's room is used, with
+    temporary objects added and deleted afterward.
+    """
+    from evennia.utils import create
+    from world.announce import Announcement
+    room = viewer.location
+    if not room:
+        return 'The viewer must be in a room.'
+    added = [create.create_object('typeclasses.objects.Object', key='bench %i' % i, location=room)
+             for i in range(max(populations) + party)]
+    mover, riders, crowd = added[0], added[1:party], added[party:]
+    names = [(each, dict(color=False)) for each in [mover] + riders] + [(room, {}), (room, {})]
+    template = '|r{0}' + ''.join('|n, |r{%i}' % i for i in range(1, len(riders))) + \
+               ' and |r{%i}|n are leaving {%i}, heading for {%i}.' % (len(riders), len(riders) + 1, len(riders) + 2)
+
+    def per_viewer(viewers):
+        for each in viewers:
+            message = [mover.get_display_name(each, color=False)]
+            message.extend(rider.get_display_name(each, color=False) for rider in riders)
+            message.append(room.get_display_name(each))
+            message.append(room.get_display_name(each))
+            each.msg(''.join(message))
+    rows = []
+    try:
+        for population in populations:
+            calls = [([viewer] + crowd[:population - 1],)] * moves
+            rows.append(('template, %i in room' % population,
+                         _timed(lambda viewers: Announcement(template, names).send(viewers), calls), moves))
+            rows.append(('per viewer, %i in room' % population, _timed(per_viewer, calls), moves))
+    finally:
+        for obj in added:
+            obj.delete()
+    return _report('Move announcements: party of %i' % party, rows)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Exit graph
+
+One in-memory adjacency map of the world covering both kinds of exit:
+Exit objects located in a room, and the simple "orange" exits kept in
+the room's `exits` attribute by the direction commands.
+
+Each room's adjacency is built the first time it is asked for and
+kept until `EXIT_GRAPH.invalidate(room)` is called. The direction
+commands invalidate a room when they change its `exits` attribute, and
+rooms invalidate themselves when an Exit object arrives, leaves or is
+deleted. Exits created or changed without those hooks (@open, @dig,
+create_object and spawn set the location directly, and builders
+re-target destinations) are caught by a database signal connected at
+server start with `EXIT_GRAPH.connect()`: saving an exit invalidates
+the room it is in and the room it was listed in. An Exit object's
+destination is read when iterating, so the graph itself is right after
+a re-target, but watchers such as the routing tables still hear of it.
+Other indexes built on the graph can `watch` it to hear which rooms
+changed.
+"""
+
+SIMPLE_DIRECTIONS = {'n': 'north', 's': 'south', 'e': 'east', 'w': 'west', 'nw': 'northwest', 'se': 'southeast',
+                     'ne': 'northeast', 'sw': 'southwest', 'u': 'up', 'd': 'down'}
+
+
+class ExitGraph(object):
+    """
+    Adjacency of rooms, keyed by room. Each entry holds a tuple of
+    Exit objects and a tuple of (direction, destination) simple exits.
+    """
+
+    def __init__(self):
+        self.adjacency = {}
+        self.builds = 0  # Count of adjacency entries built, for statistics.
+        self.watchers = []  # Called with each room invalidated.
+        self.listed = {}  # Exit object: room whose entry lists it
+
+    def _entry(self, room):
+        """Return the adjacency entry of room, building it when missing."""
+        entry = self.adjacency.get(room)
+        if entry is None:
+            exits = tuple(con for con in room.contents if con.destination)
+            self.listed.update((each, room) for each in exits)
+            ways = room.db.exits or {}
+            simple = tuple((way, ways[way]) for way in ways if ways[way])
+            entry = (exits, simple)
+            self.adjacency[room] = entry
+            self.builds += 1
+        return entry
+
+    def exit_objects(self, room):
+        """Exit objects leading out of room."""
+        return self._entry(room)[0] if room else ()
+
+    def simple_exits(self, room):
+        """Simple exits out of room as a tuple of (direction, destination)."""
+        return self._entry(room)[1] if room else ()
+
+    def neighbours(self, room):
+        """
+        Iterate over the ways out of room, Exit objects first.
+        Yields:
+            (way, destination) where way is an Exit object or a simple exit
+            direction string such as 'n'.
+        """
+        if not room:
+            return
+        exits, simple = self._entry(room)
+        for each in exits:
+            destination = each.destination
+            if destination:
+                yield each, destination
+        for way, destination in simple:
+            yield way, destination
+
+    def invalidate(self, *rooms):
+        """Forget the adjacency of the given rooms; it is rebuilt when next needed."""
+        for room in rooms:
+            if room is not None:
+                self.adjacency.pop(room, None)
+                for watcher in self.watchers:
+                    watcher(room)
+
+    def watch(self, callback):
+        """Have callback(room) called whenever a room's exits are invalidated."""
+        if callback not in self.watchers:
+            self.watchers.append(callback)
+
+    def clear(self):
+        """Forget all adjacency."""
+        self.adjacency.clear()
+        self.listed.clear()
+
+    def saved(self, sender, instance, **kwargs):
+        """Django post_save receiver: an exit was created, moved or re-targeted."""
+        if getattr(instance, 'db_destination', None) or instance in self.listed:
+            self.invalidate(self.listed.pop(instance, None), instance.db_location)
+
+    def connect(self):
+        """Connect the receiver that catches exits changed without the move hooks."""
+        from django.db.models.signals import post_save
+        # Saves are sent by each typeclass, a proxy of ObjectDB, so are not filtered by sender.
+        post_save.connect(self.saved, dispatch_uid='exit_graph_saved')
+
+
+EXIT_GRAPH = ExitGraph()
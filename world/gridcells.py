@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+Grid cell store
+
+The cells of a Grid room (name, desc, flags, `into` room and the like)
+kept in fixed-size square chunks, each chunk saved as its own attribute
+in the 'grid' category of the room. A chunk is read from the database
+the first time one of its cells is asked for and then served from
+memory. Writes change the chunk in memory and mark it dirty, and the
+dirty chunks alone are saved a few seconds later, so a footstep on a
+large grid saves one small chunk at most, not the whole grid.
+
+Dirty chunks of every store are also saved when the server stops.
+Cells kept in the room's `grid` attribute before chunking are moved
+into chunks the first time the store is used.
+
+The trail store keeps where each traveller has stepped on the grid, as
+a ring buffer of the latest (coord, time) stamps per traveller. Stamps
+older than the grid's retention are dropped whenever the trails are
+saved, and stamps left in cells before trails existed are moved out of
+the cells the first time the trails are used.
+
+The contents index keeps which objects in a Grid room are in which
+cell, so the objects of one cell, or of the cells near it, are found
+without comparing every object in the room. It is saved like the
+chunks, so placements survive a reload.
+"""
+from collections import deque
+CHUNK_SIZE = 16  # Cells along each side of a chunk
+CATEGORY = 'grid'  # Attribute category of saved chunks
+FLUSH_DELAY = 5  # Seconds after a change before dirty chunks are saved
+SETTINGS = ('min', 'max', 'current', 'base')  # Keys of the grid attribute that are not cells
+TRAIL_LENGTH = 100  # Latest stamps kept per traveller, unless the room's trail_length attribute says otherwise
+TRAIL_RETENTION = 7 * 24 * 3600  # Seconds a stamp is kept, unless the room's trail_retention attribute says otherwise
+_PENDING = set()  # Stores with changes waiting to be saved
+
+
+def chunk_name(key):
+    """Attribute name of the chunk with key (cx, cy)."""
+    return 'chunk %i,%i' % key
+
+
+def _unpack(saved):
+    """Plain dict copy of a saved chunk, so changes to it are not saved at once."""
+    return dict((tuple(coord), dict(cell)) for coord, cell in (saved or {}).items())
+
+
+class CellStore(object):
+    """Chunked cells of one Grid room."""
+
+    def __init__(self, room, size=CHUNK_SIZE):
+        self.room = room
+        self.size = size
+        self.chunks = {}  # (cx, cy): {(x, y): cell dict}
+        self.dirty = set()
+        self.version = 0  # Counts changes, so views of the cells can tell when to redraw
+        self.migrated = False
+
+    def chunk_of(self, coord):
+        """Key of the chunk holding coord."""
+        return coord[0] // self.size, coord[1] // self.size
+
+    def _chunk(self, key):
+        """The chunk with key, read through from the database when not yet loaded."""
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            if not self.migrated:
+                self.migrate()
+                chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = _unpack(self.room.attributes.get(chunk_name(key), category=CATEGORY))
+        return chunk
+
+    def cell(self, coord, create=False):
+        """The cell dict at coord, or None. With create, an empty cell is added when missing."""
+        if coord is None:
+            return None
+        coord = tuple(coord)
+        chunk = self._chunk(self.chunk_of(coord))
+        cell = chunk.get(coord)
+        if cell is None and create:
+            cell = chunk[coord] = {}
+        return cell
+
+    def get(self, coord, key=None):
+        """Entry key of the cell at coord, or a copy of the whole cell if key is None."""
+        cell = self.cell(coord) or {}
+        return cell.get(key) if key else dict(cell)
+
+    def set(self, coord, key, value):
+        """Set entry key of the cell at coord."""
+        self.cell(coord, create=True)[key] = value
+        self.changed(coord)
+
+    def pop(self, coord, key):
+        """Remove entry key of the cell at coord, returning it."""
+        cell = self.cell(coord)
+        if not cell or key not in cell:
+            return None
+        value = cell.pop(key)
+        if not cell:
+            del self._chunk(self.chunk_of(tuple(coord)))[tuple(coord)]
+        self.changed(coord)
+        return value
+
+    def changed(self, coord):
+        """Mark the chunk of coord dirty and have it saved soon."""
+        self.dirty.add(self.chunk_of(tuple(coord)))
+        self.version += 1
+        if self not in _PENDING:
+            from evennia.utils.utils import delay
+            _PENDING.add(self)
+            delay(FLUSH_DELAY, self.flush)
+
+    def flush(self):
+        """Save the dirty chunks. Returns the number saved."""
+        _PENDING.discard(self)
+        dirty, self.dirty = self.dirty, set()
+        for key in dirty:
+            chunk = self.chunks.get(key)
+            if chunk:
+                self.room.attributes.add(chunk_name(key), chunk, category=CATEGORY)
+            else:
+                self.room.attributes.remove(chunk_name(key), category=CATEGORY)
+        return len(dirty)
+
+    def migrate(self):
+        """Move cells kept in the room's grid attribute into chunks."""
+        self.migrated = True
+        grid = self.room.db.grid
+        if not grid:
+            return
+        cells = [key for key in grid.keys() if key not in SETTINGS]
+        for coord in cells:
+            coord = tuple(coord)
+            key = self.chunk_of(coord)
+            if key not in self.chunks:
+                self.chunks[key] = _unpack(self.room.attributes.get(chunk_name(key), category=CATEGORY))
+            self.chunks[key][coord] = dict(grid[coord])
+            self.dirty.add(key)
+        if cells:
+            self.room.db.grid = dict((key, grid[key]) for key in SETTINGS if key in grid)
+            self.flush()
+
+    def load(self):
+        """Read every saved chunk not yet loaded."""
+        if not self.migrated:
+            self.migrate()
+        for attr in self.room.attributes.all():
+            if attr.category == CATEGORY and attr.key.startswith('chunk '):
+                key = tuple(int(n) for n in attr.key[len('chunk '):].split(','))
+                if key not in self.chunks:
+                    self.chunks[key] = _unpack(attr.value)
+
+    def items(self):
+        """Every (coord, cell) of the grid."""
+        self.load()
+        return [(coord, cell) for chunk in self.chunks.values() for coord, cell in chunk.items()]
+
+
+class TrailStore(object):
+    """Latest stamps of each traveller on one Grid room."""
+
+    def __init__(self, room):
+        self.room = room
+        self.length = room.db.trail_length or TRAIL_LENGTH
+        self.retention = room.db.trail_retention or TRAIL_RETENTION
+        self.trails = {}  # traveller: deque of (coord, time), oldest first
+        saved = room.attributes.get('trails', category=CATEGORY)
+        if saved is None:
+            self.migrate()
+        else:
+            for traveller, stamps in saved.items():
+                if traveller:  # Deleted travellers come back as None.
+                    self.trails[traveller] = deque((tuple(coord), when) for coord, when in stamps)
+        self.dirty = False
+
+    def _trail(self, traveller):
+        trail = self.trails.get(traveller)
+        if trail is None:
+            trail = self.trails[traveller] = deque(maxlen=self.length)
+        return trail
+
+    def stamp(self, traveller, coord, when):
+        """Record traveller at coord at time when."""
+        self._trail(traveller).append((tuple(coord), when))
+        self.changed()
+
+    def last(self, traveller):
+        """Latest (coord, time) of traveller, or None."""
+        trail = self.trails.get(traveller)
+        return trail[-1] if trail else None
+
+    def stamps(self, traveller):
+        """Stamps of traveller as a list of (coord, time), latest to oldest."""
+        return list(reversed(self.trails.get(traveller, ())))
+
+    def travellers(self):
+        """Every traveller with a trail."""
+        return list(self.trails)
+
+    def compact(self, now):
+        """Drop stamps older than the retention, and travellers left without any."""
+        oldest = now - self.retention
+        for traveller, trail in list(self.trails.items()):
+            while trail and trail[0][1] < oldest:
+                trail.popleft()
+            if not trail:
+                del self.trails[traveller]
+
+    def changed(self):
+        """Have the trails saved soon."""
+        self.dirty = True
+        if self not in _PENDING:
+            from evennia.utils.utils import delay
+            _PENDING.add(self)
+            delay(FLUSH_DELAY, self.flush)
+
+    def flush(self):
+        """Compact and save the trails if changed. Returns 1 if saved, else 0."""
+        import time
+        _PENDING.discard(self)
+        if not self.dirty:
+            return 0
+        self.dirty = False
+        self.compact(time.time())
+        self.room.attributes.add('trails', dict((traveller, list(trail)) for traveller, trail in self.trails.items()),
+                                 category=CATEGORY)
+        return 1
+
+    def migrate(self):
+        """Move timestamps that travellers left in the grid cells into trails."""
+        cells = self.room.cells
+        found = []
+        for coord, cell in cells.items():
+            for key in [key for key in cell if key is None or hasattr(key, 'id')]:  # Travellers, or deleted ones
+                found.append((cell[key], coord, key))
+                cells.pop(coord, key)
+        for when, coord, traveller in sorted(found, key=lambda each: each[0]):
+            if traveller:
+                self._trail(traveller).append((coord, when))
+        self.dirty = True
+        self.flush()
+
+
+class CellContents(object):
+    """Objects of one Grid room by the cell they are in."""
+
+    def __init__(self, room):
+        self.room = room
+        self.where = {}  # object: (x, y)
+        self.cells = {}  # (x, y): set of objects
+        self.dirty = False
+        for obj, coord in (room.attributes.get('contents', category=CATEGORY) or {}).items():
+            if obj and obj.location == room:  # Deleted objects come back as None.
+                self.place(obj, tuple(coord), save=False)
+                if not obj.ndb.grid_loc:
+                    obj.ndb.grid_loc = tuple(coord)
+
+    def place(self, obj, coord, save=True):
+        """Put obj in the cell at coord."""
+        coord = tuple(coord)
+        old = self.where.get(obj)
+        if old == coord:
+            return
+        if old is not None:
+            self._discard(obj, old)
+        self.where[obj] = coord
+        self.cells.setdefault(coord, set()).add(obj)
+        if save:
+            self.changed()
+
+    def remove(self, obj):
+        """Take obj out of the index."""
+        old = self.where.pop(obj, None)
+        if old is not None:
+            self._discard(obj, old)
+            self.changed()
+
+    def _discard(self, obj, coord):
+        here = self.cells.get(coord)
+        if here is not None:
+            here.discard(obj)
+            if not here:
+                del self.cells[coord]
+
+    def coord_of(self, obj):
+        """Cell of obj, or None."""
+        return self.where.get(obj)
+
+    def at(self, coord):
+        """Objects in the cell at coord."""
+        return self.cells.get(tuple(coord), ()) if coord else ()
+
+    def near(self, coord, distance=1):
+        """Objects within distance cells of coord, in either direction, including the cell itself."""
+        x, y = coord
+        return [obj for _, objs in self.within((x - distance, y - distance), (x + distance, y + distance))
+                for obj in objs]
+
+    def within(self, low, high):
+        """
+        (coord, objects) of each occupied cell from low to high, corners included.
+        Looks up each cell of the area, or goes through the occupied cells when there are fewer.
+        """
+        (x0, y0), (x1, y1) = low, high
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(self.cells):
+            cells = self.cells
+            return [((x, y), cells[(x, y)]) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)
+                    if (x, y) in cells]
+        return [((x, y), objs) for (x, y), objs in self.cells.items() if x0 <= x <= x1 and y0 <= y <= y1]
+
+    def changed(self):
+        """Have the index saved soon."""
+        self.dirty = True
+        if self not in _PENDING:
+            from evennia.utils.utils import delay
+            _PENDING.add(self)
+            delay(FLUSH_DELAY, self.flush)
+
+    def flush(self):
+        """Save the index if changed. Returns 1 if saved, else 0."""
+        _PENDING.discard(self)
+        if not self.dirty:
+            return 0
+        self.dirty = False
+        self.room.attributes.add('contents', dict(self.where), category=CATEGORY)
+        return 1
+
+
+def flush_all():
+    """Save the dirty chunks and trails of every store. Returns the number saved."""
+    return sum(store.flush() for store in list(_PENDING))
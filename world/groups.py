@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Group index
+
+Who follows whom and who rides whom, both ways: leader -> followers and
+mount -> riders as kept in each leader's `followers` and each mount's
+`riders` attribute lists, and follower -> leaders and rider -> mount
+held in memory beside them. The attributes stay the saved form; the
+reverse maps are loaded from them the first time the index is asked,
+so finding who moves along with someone, or whether someone is riding
+anything, no longer means searching the room.
+
+Change the lists through `follow` and `ride` so both directions stay
+in step. An entry of the reverse maps is checked against the attribute
+before it is trusted, and dropped if the attribute no longer lists it,
+so a list edited directly is not misread; Tangible.at_object_delete
+calls `forget` so a deleted object leaves no entries behind.
+"""
+
+
+class GroupIndex(object):
+    """Followers and riders, both ways."""
+
+    def __init__(self):
+        self.leaders = {}  # follower: set of leaders
+        self.mounts = {}  # rider: mount
+        self.ready = False
+
+    def rebuild(self):
+        """Load the reverse maps from every followers and riders attribute. Returns the number of groups."""
+        from evennia.objects.models import ObjectDB
+        self.leaders, self.mounts = {}, {}
+        groups = 0
+        for obj in ObjectDB.objects.filter(db_attributes__db_key__in=('followers', 'riders')).distinct():
+            for follower in obj.db.followers or ():
+                self.leaders.setdefault(follower, set()).add(obj)
+            for rider in obj.db.riders or ():
+                self.mounts[rider] = obj
+            groups += 1
+        self.ready = True
+        return groups
+
+    def _ready(self):
+        if not self.ready:
+            self.rebuild()
+
+    @staticmethod
+    def followers_of(leader):
+        """Followers of leader."""
+        return list(leader.db.followers or ())
+
+    @staticmethod
+    def riders_of(mount):
+        """Riders of mount."""
+        return list(mount.db.riders or ())
+
+    def mount_of(self, rider):
+        """What rider is riding, or None."""
+        self._ready()
+        mount = self.mounts.get(rider)
+        if mount is not None and rider not in self.riders_of(mount):
+            del self.mounts[rider]
+            return None
+        return mount
+
+    def leaders_of(self, follower):
+        """Those follower is following."""
+        self._ready()
+        leaders = self.leaders.get(follower)
+        if not leaders:
+            return set()
+        for leader in [each for each in leaders if follower not in self.followers_of(each)]:
+            leaders.discard(leader)
+        return set(leaders)
+
+    def follow(self, follower, leader):
+        """Start follower following leader, or stop if already following. Returns True if now following."""
+        self._ready()
+        followers = self.followers_of(leader)
+        if follower in followers:
+            followers.remove(follower)
+            self.leaders.get(follower, set()).discard(leader)
+        else:
+            followers.append(follower)
+            self.leaders.setdefault(follower, set()).add(leader)
+        leader.db.followers = followers
+        return follower in followers
+
+    def ride(self, rider, mount):
+        """
+        Start rider riding mount, or stop if already riding it. Riding
+        one thing stops riding anything else. Returns True if now riding.
+        """
+        old = self.mount_of(rider)
+        self.mounts.pop(rider, None)
+        if old is not None:
+            old.db.riders = [each for each in self.riders_of(old) if each != rider]
+        if old == mount:
+            return False
+        mount.db.riders = self.riders_of(mount) + [rider]
+        self.mounts[rider] = mount
+        return True
+
+    def party(self, leader, location):
+        """
+        Who moves along when leader leaves location.
+        Returns:
+            (riders, followers) in location: riders of leader, and followers
+            of leader not riding anything in location.
+        """
+        self._ready()
+        riders = [each for each in self.riders_of(leader) if each.location == location]
+        followers = [each for each in self.followers_of(leader) if each.location == location and
+                     not (self.mount_of(each) and self.mounts[each].location == location)]
+        return riders, followers
+
+    def forget(self, obj):
+        """Take obj, about to be deleted, out of every group it leads, follows, carries or rides."""
+        self._ready()
+        for leader in self.leaders_of(obj):
+            leader.db.followers = [each for each in self.followers_of(leader) if each != obj]
+        mount = self.mount_of(obj)
+        if mount is not None:
+            mount.db.riders = [each for each in self.riders_of(mount) if each != obj]
+        for follower in self.followers_of(obj):
+            self.leaders.get(follower, set()).discard(obj)
+        for rider in self.riders_of(obj):
+            if self.mounts.get(rider) == obj:
+                del self.mounts[rider]
+        self.leaders.pop(obj, None)
+        self.mounts.pop(obj, None)
+
+
+GROUPS = GroupIndex()
@@ -3,6 +3,7 @@ Helpers
 
 Methods that are helpful to have in a module.
 """
+from world.speechnames import SPEECH_NAMES  # Names for /name substitution
 
 
 def make_bar(value, maximum, length, gradient):
@@ -50,27 +51,26 @@ def escape_braces(text):
 def substitute_objects(text, puppet):
     if '/' not in text:
         return text
-    candidates = [puppet] + puppet.contents
-    if puppet.location:
-        candidates = list(set(candidates + [puppet.location] + puppet.location.contents +
-                              (list(puppet.location.db.hosted.keys()) if puppet.location.db.hosted else [])))
+    words = text.split()
+    marked = []  # Search word and ending of each word marked for substitution, else None
+    for each in words:
+        search = None
+        if each.startswith('/') and not each.endswith('/') and not each[1:].startswith('/'):
+            search_word, word_end = each[1:], ''  # Marked for substitution; /italic/ and //escaped are not
+            if "'" in each:  # Test for possessive or contraction:  's  (apostrophe before end of grouping)
+                pass
+            if each[-1] in ".,!?":
+                search_word, word_end = search_word[:-1], each[-1]
+            search = (search_word, word_end)
+        marked.append(search)
+    found = SPEECH_NAMES.resolve(puppet, [search[0] for search in marked if search])
     return_text = []
-    for each in text.split():
-        match = None
-        new_each = each
-        word_end = ''
-        if each.startswith('/'):  # A possible substitution to test
-            if each.endswith('/'):  # Skip this one, it's /italic/
-                return_text.append(new_each)
-                continue
-            search_word = each[1:]
-            if search_word.startswith('/'):  # Skip this one, it's being escaped
-                new_each = each[1:]
-            else:  # Marked for substitution, try to find a match
-                if "'" in each:  # Test for possessive or contraction:  's  (apostrophe before end of grouping)
-                    pass
-                if each[-1] in ".,!?":
-                    search_word, word_end = search_word[:-1], each[-1]
-                match = puppet.search(search_word, quiet=True, candidates=candidates)
-        return_text.append(new_each if not match else (match[0].get_display_name(puppet) + word_end))
+    for each, search in zip(words, marked):
+        match = found.get(search[0]) if search else None
+        if match:
+            return_text.append(match.get_display_name(puppet) + search[1])
+        elif each.startswith('//') and not each.endswith('/'):
+            return_text.append(each[1:])  # Escaped substitution
+        else:
+            return_text.append(each)
     return ' '.join(return_text)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Aggregate mass
+
+Each tangible keeps its total mass, its own `mass` trait plus the totals
+of its contents, in memory beside the total of each thing it holds. The
+totals are worked out once, the first time asked, and then kept up to
+date by difference: at_object_receive and at_object_leave add and drop
+a thing's total, and a change of the mass trait passes the difference
+up through every location holding it. Reading the mass of a character
+carrying bags of bags no longer walks the whole tree.
+
+A tangible flagged `weightless` with no mass of its own weighs nothing,
+whatever it holds, so changes inside it go no further. Adding or
+removing the flag is heard by the tag signal connected at server start
+with `connect()`, and passes the change of total up the same way.
+
+Eating, drinking and destroying take things away through
+Tangible.leave_location, and deleting a tangible drops it from its
+holder's totals. Objects otherwise set straight to a location are not
+seen; `check` compares the kept totals against a full walk, and puts
+them right when asked.
+
+Set up on a typeclass as a lazy property, like the TraitHandler:
+
+    @lazy_property
+    def masses(self):
+        return MassTotals(self)
+"""
+
+
+class MassTotals(object):
+    """Kept mass total of one tangible and of each thing it holds."""
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.parts = None  # thing held: its total, once loaded
+        self.held = 0  # Sum of parts
+        self.own = 0
+        self.flagged = False  # Carries the weightless flag
+
+    def own_mass(self):
+        """Mass of the object alone, from its mass trait."""
+        return self.obj.traits.mass.actual if self.obj.traits.mass else 0
+
+    def has_flag(self):
+        """True if the object carries the weightless flag."""
+        return bool(self.obj.tags.get('weightless', category='flags'))
+
+    def weightless(self):
+        """True if the object weighs nothing whatever it holds."""
+        return self.own <= 0 and self.flagged
+
+    def load(self):
+        """Work out the totals of everything held, each from its own kept totals."""
+        self.own, self.flagged = self.own_mass(), self.has_flag()
+        self.parts = dict((con, con.masses.total()) for con in self.obj.contents if hasattr(con, 'masses'))
+        self.held = sum(self.parts.values())
+
+    def total(self):
+        """Mass of the object and everything it holds."""
+        if self.parts is None:
+            self.load()
+        return self.own if self.weightless() else self.own + self.held
+
+    def _shift(self, own=0, held=0, flagged=None):
+        """Change own mass, held sum and weightless flag, and pass any change of total on to the location."""
+        before = self.total()
+        self.own += own
+        self.held += held
+        if flagged is not None:
+            self.flagged = flagged
+        after = self.total()
+        location = self.obj.location
+        if after != before and location and hasattr(location, 'masses'):
+            location.masses.update(self.obj, after)
+
+    def add(self, thing):
+        """Count thing as held."""
+        if self.parts is None or thing in self.parts or not hasattr(thing, 'masses'):
+            return  # Not loaded yet, so counted when loaded; or already counted.
+        value = self.parts[thing] = thing.masses.total()
+        self._shift(held=value)
+
+    def remove(self, thing):
+        """Stop counting thing as held."""
+        if self.parts is not None and thing in self.parts:
+            self._shift(held=-self.parts.pop(thing))
+
+    def update(self, thing, value):
+        """Held thing now has total value."""
+        if self.parts is not None and thing in self.parts:
+            delta = value - self.parts[thing]
+            self.parts[thing] = value
+            self._shift(held=delta)
+
+    def refresh(self):
+        """Read the mass trait and weightless flag again, after either may have changed."""
+        if self.parts is not None:
+            self._shift(own=self.own_mass() - self.own, flagged=self.has_flag())
+
+    def check(self, fix=False):
+        """
+        Compare kept totals of the object and everything inside against a full walk.
+        Args:
+            fix (bool): Load again the totals of each tangible found wrong.
+        Returns:
+            [(tangible, kept total, walked total)] for each tangible found wrong.
+        """
+        wrong = []
+        self._walk(wrong, fix)
+        return wrong
+
+    def _walk(self, wrong, fix):
+        """Total walked from the contents, noting each tangible whose kept total differs."""
+        own = self.own_mass()
+        walked = own + sum(con.masses._walk(wrong, fix) for con in self.obj.contents if hasattr(con, 'masses'))
+        if own <= 0 and self.has_flag():
+            walked = own
+        kept = self.total()
+        if kept != walked:
+            wrong.append((self.obj, kept, walked))
+            if fix:
+                self.load()
+        return walked
+
+
+def tags_changed(sender, instance, action, **kwargs):
+    """Receiver for object tag changes: a tangible's weightless flag may have been set or removed."""
+    if action in ('post_add', 'post_remove', 'post_clear') and 'masses' in getattr(instance, '__dict__', {}):
+        instance.masses.refresh()
+
+
+def connect():
+    """Connect the receiver that hears weightless flags set and removed."""
+    from django.db.models.signals import m2m_changed
+    from evennia.objects.models import ObjectDB
+    m2m_changed.connect(tags_changed, sender=ObjectDB.db_tags.through, dispatch_uid='mass_tags')
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Grid minimap
+
+Draws the cells of a Grid room around a point, marking occupied, named,
+impassable and `into` cells. The state of every cell of the grid is
+worked out once into one array per row, and the rows of each viewport
+are drawn from that array in one pass. The array and the drawn rows are
+kept until the grid's cell store changes (or its size or carve flag do),
+so only rows with someone in them are drawn again as people move.
+Grid.at_object_delete calls `forget` for a grid being deleted.
+"""
+OUTSIDE, PLAIN, NAMED, INTO, BLOCKED, OCCUPIED, YOU = range(7)
+SMALL = {OUTSIDE: ('   ',), PLAIN: ('|x . |n',), NAMED: ('|c o |n',), INTO: ('|530 + |n',),
+         BLOCKED: ('|X # |n',), OCCUPIED: ('|g * |n',), YOU: ('|y @ |n',)}
+LARGE = {OUTSIDE: ('      ', '      '), PLAIN: ('[   ] ', '[___] '), NAMED: ('[|co|n  ] ', '[___] '),
+         INTO: ('[|530+|n  ] ', '[___] '), BLOCKED: ('|X[###]|n ', '|X[###]|n '),
+         OCCUPIED: ('[ |g*|n ] ', '[___] '), YOU: ('[ |y@|n ] ', '[___] ')}
+RADIUS = 3  # Cells shown each way from the center by default
+
+_MAPS = {}  # Grid room: (key, states, drawn rows)
+
+
+def forget(room):
+    """Drop the states and drawn rows kept for room."""
+    _MAPS.pop(room, None)
+
+
+def cell_state(cell, carve):
+    """State of a cell from its entries, as grid motion would treat it."""
+    if cell.get('empty') or (carve and not cell.get('name') and not cell.get('desc')):
+        return BLOCKED
+    if cell.get('into'):
+        return INTO
+    return NAMED if cell.get('name') else PLAIN
+
+
+def states(room):
+    """
+    Cell states of the whole grid, and the grid's bounds.
+    Returns:
+        (low, high, rows) where rows[y - low[1]][x - low[0]] is the state of (x, y).
+    """
+    low, high, carve = room.grid('min'), room.grid('max'), bool(room.tags.get('carve', category='flags'))
+    key = (room.cells.version, tuple(low), tuple(high), carve)
+    cached = _MAPS.get(room)
+    if cached and cached[0] == key:
+        return low, high, cached[1]
+    width = high[0] - low[0] + 1
+    rows = [bytearray([BLOCKED if carve else PLAIN]) * width for _ in range(high[1] - low[1] + 1)]
+    for (x, y), cell in room.cells.items():
+        if low[0] <= x <= high[0] and low[1] <= y <= high[1]:
+            rows[y - low[1]][x - low[0]] = cell_state(cell, carve)
+    _MAPS[room] = (key, rows, {})
+    return low, high, rows
+
+
+def render(room, center, radius=RADIUS, viewer=None, glyphs=SMALL, box=None):
+    """
+    Draw a Grid room's cells.
+    Args:
+        room (Grid): the grid room.
+        center (tuple): (x, y) cell shown marked as the viewer's.
+        radius (int): cells shown each way from center.
+        viewer (Object): left out of the occupants shown.
+        glyphs (dict): SMALL or LARGE, the text drawn for each state.
+        box (tuple): ((x0, y0), (x1, y1)) area drawn instead of the one around center.
+    Returns:
+        list of lines of text.
+    """
+    low, high, rows = states(room)
+    drawn = _MAPS[room][2]
+    (x0, y0), (x1, y1) = box or ((center[0] - radius, center[1] - radius), (center[0] + radius, center[1] + radius))
+    occupied = {}  # y: x of each occupied cell in row y
+    for (x, y), objs in room.cell_contents.within((x0, y0), (x1, y1)):
+        if any(obj != viewer and not obj.destination for obj in objs):
+            occupied.setdefault(y, set()).add(x)
+    lines = []
+    for y in range(y0, y1 + 1):
+        key = (y, x0, x1, id(glyphs))
+        marks = occupied.get(y, ())
+        you = center and center[1] == y and x0 <= center[0] <= x1
+        plain = not (marks or you)
+        if plain and key in drawn:
+            lines.extend(drawn[key])
+            continue
+        if low[1] <= y <= high[1]:
+            row = rows[y - low[1]]
+            cells = [row[x - low[0]] if low[0] <= x <= high[0] else OUTSIDE for x in range(x0, x1 + 1)]
+        else:
+            cells = [OUTSIDE] * (x1 - x0 + 1)
+        for x in marks:
+            cells[x - x0] = OCCUPIED
+        if you:
+            cells[center[0] - x0] = YOU
+        text = [''.join(glyphs[state][line] for state in cells) for line in range(len(glyphs[PLAIN]))]
+        if plain:
+            drawn[key] = text
+        lines.extend(text)
+    return lines
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Movement scheduler
+
+Timed journeys along path exits, all held in one queue ordered by
+arrival time and driven by a single reactor call set for the next
+arrival, instead of a Deferred per traveller.
+
+A journey is started by Exit.at_traverse with the traveller's speed
+from MOVE_DELAY, and ends with the exit's `finish_traverse`. `stop`
+pauses a journey, keeping the time still to go, and `resume` carries
+on from there. A traveller on a journey has `ndb.currently_moving` set,
+as the commands that refuse to act while moving expect.
+
+Journeys in progress and paused are saved at server stop and restored
+at start, so a reload does not leave travellers stranded in exits.
+"""
+import heapq
+import time
+from itertools import count
+
+CONFIG_KEY = 'movement_journeys'  # ServerConfig key holding journeys over a reload
+
+
+class MovementScheduler(object):
+    """Travellers on path exits, by arrival time."""
+
+    def __init__(self):
+        self.journeys = {}  # traveller: (arrival time, exit)
+        self.paused = {}  # traveller: (exit, seconds still to go)
+        self.queue = []  # Heap of (arrival time, sequence, traveller)
+        self.sequence = count()
+        self.timer = None
+
+    def moving(self, traveller):
+        """True if traveller is on a journey."""
+        return traveller in self.journeys
+
+    def start(self, traveller, exit, delay, now=None):
+        """Start traveller on its way through exit, arriving after delay seconds."""
+        due = (now or time.time()) + delay
+        self.paused.pop(traveller, None)
+        self.journeys[traveller] = (due, exit)
+        heapq.heappush(self.queue, (due, next(self.sequence), traveller))
+        traveller.ndb.currently_moving = True
+        self._arm()
+
+    def stop(self, traveller, now=None):
+        """Pause traveller's journey. Returns True if it was moving."""
+        journey = self.journeys.pop(traveller, None)
+        traveller.nattributes.remove('currently_moving')
+        if journey is None:
+            return False
+        due, exit = journey
+        self.paused[traveller] = (exit, max(0, due - (now or time.time())))
+        return True
+
+    def cancel(self, traveller):
+        """End traveller's journey, moving or paused, without arriving."""
+        self.journeys.pop(traveller, None)
+        self.paused.pop(traveller, None)
+        traveller.nattributes.remove('currently_moving')
+
+    def resume(self, traveller):
+        """Carry on a paused journey from where it stopped. Returns True if resumed."""
+        exit, remaining = self.paused.pop(traveller, (None, 0))
+        if exit is None or traveller.location != exit:
+            return False
+        self.start(traveller, exit, remaining)
+        return True
+
+    def _arm(self):
+        """Set the reactor call for the next arrival."""
+        from twisted.internet import reactor
+        while self.queue and self.journeys.get(self.queue[0][2], (None,))[0] != self.queue[0][0]:
+            heapq.heappop(self.queue)  # Stopped, or started again since.
+        if not self.queue:
+            return
+        delay = max(0, self.queue[0][0] - time.time())
+        if self.timer and self.timer.active():
+            if self.timer.getTime() > self.queue[0][0]:
+                self.timer.reset(delay)
+        else:
+            self.timer = reactor.callLater(delay, self._arrive)
+
+    def _arrive(self):
+        """Finish every journey now due, then wait for the next."""
+        from world.access import ACCESS
+        self.timer = None
+        now = time.time()
+        ACCESS.begin()  # Lock checks of the arrivals and their looks kept for the batch
+        try:
+            while self.queue and self.queue[0][0] <= now:
+                due, _, traveller = heapq.heappop(self.queue)
+                journey = self.journeys.get(traveller)
+                if journey is None or journey[0] != due:
+                    continue
+                del self.journeys[traveller]
+                traveller.nattributes.remove('currently_moving')
+                exit = journey[1]
+                if traveller.location == exit:  # Not taken elsewhere on the way
+                    exit.finish_traverse(traveller)
+        finally:
+            ACCESS.end()
+            self._arm()  # Even if an arrival failed, the other journeys carry on.
+
+    def save(self):
+        """Keep the journeys in progress and paused in ServerConfig, as times still to go."""
+        from evennia.server.models import ServerConfig
+        now = time.time()
+        saved = dict((traveller.id, (exit.id, max(0, due - now), False))
+                     for traveller, (due, exit) in self.journeys.items())
+        saved.update((traveller.id, (exit.id, remaining, True)) for traveller, (exit, remaining) in self.paused.items())
+        ServerConfig.objects.conf(CONFIG_KEY, saved)
+        return len(saved)
+
+    def restore(self):
+        """Restart the journeys kept by save. Returns the number restored."""
+        from evennia.objects.models import ObjectDB
+        from evennia.server.models import ServerConfig
+        saved = ServerConfig.objects.conf(CONFIG_KEY) or {}
+        ServerConfig.objects.conf(CONFIG_KEY, delete=True)
+        objects = ObjectDB.objects.in_bulk([key for key in saved] + [value[0] for value in saved.values()])
+        restored = 0
+        for traveller_id, (exit_id, remaining, paused) in saved.items():
+            traveller, exit = objects.get(traveller_id), objects.get(exit_id)
+            if not (traveller and exit and traveller.location == exit):
+                continue
+            if paused:
+                self.paused[traveller] = (exit, remaining)
+            else:
+                self.start(traveller, exit, remaining)
+            restored += 1
+        return restored
+
+
+MOVEMENT = MovementScheduler()
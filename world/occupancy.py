@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Occupancy analytics
+
+Arrivals, departures, time spent and commands of puppeted characters,
+per location, counted in one-minute bins over the last day. Each
+location keeps fixed-size arrays indexed by bin, reused as the day
+rolls over, so a query reads at most BINS entries however busy the
+location has been.
+
+Arrivals and departures come from the presence index, which hears of
+every puppet, unpuppet and move; commands are counted by
+MuxCommand.at_post_cmd. The counts are held in memory only, so they
+cover the time since the server last started. A location's arrays are
+let go when it is deleted (Tangible.at_object_delete), and, checked
+every PRUNE_SECONDS, once nobody is there and all its bins are older
+than a day.
+"""
+import time
+from array import array
+from world.presence import PRESENCE
+
+BIN_SECONDS = 60
+BINS = 24 * 60  # A day of one-minute bins
+PRUNE_SECONDS = 3600  # Time between looks for locations with only expired bins
+
+
+class LocationStats(object):
+    """Binned occupancy counts of one location."""
+
+    def __init__(self):
+        self.epoch = array('l', [-1]) * BINS  # Absolute bin number held by each slot
+        self.arrivals = array('i', [0]) * BINS
+        self.departures = array('i', [0]) * BINS
+        self.dwell = array('d', [0.0]) * BINS  # Seconds spent here by those departing in the bin
+        self.peak = array('i', [0]) * BINS  # Most characters present at once in the bin
+        self.active = [None] * BINS  # {character: commands} per bin, when any
+        self.present = {}  # character: arrival time
+
+    def slot(self, now):
+        """Slot of the bin holding now, cleared first if it still holds an older bin."""
+        number = int(now // BIN_SECONDS)
+        index = number % BINS
+        if self.epoch[index] != number:
+            self.epoch[index] = number
+            self.arrivals[index] = self.departures[index] = self.peak[index] = 0
+            self.dwell[index] = 0.0
+            self.active[index] = None
+        return index
+
+    def slots(self, now, seconds):
+        """Slots of the bins within the last seconds."""
+        newest = int(now // BIN_SECONDS)
+        oldest = newest - min(BINS, max(1, int(seconds // BIN_SECONDS))) + 1
+        return [index for index in range(BINS) if oldest <= self.epoch[index] <= newest]
+
+    def expired(self, now):
+        """True if nobody is here and every bin is older than a day."""
+        return not self.present and max(self.epoch) <= int(now // BIN_SECONDS) - BINS
+
+    def arrive(self, character, now):
+        index = self.slot(now)
+        self.arrivals[index] += 1
+        self.present[character] = now
+        self.peak[index] = max(self.peak[index], len(self.present))
+
+    def depart(self, character, now):
+        index = self.slot(now)
+        since = self.present.pop(character, None)
+        if since is not None:
+            self.departures[index] += 1
+            self.dwell[index] += now - since
+
+    def command(self, character, now):
+        index = self.slot(now)
+        self.peak[index] = max(self.peak[index], len(self.present))
+        counts = self.active[index]
+        if counts is None:
+            counts = self.active[index] = {}
+        counts[character] = counts.get(character, 0) + 1
+
+
+class Occupancy(object):
+    """Occupancy counts of every location."""
+
+    def __init__(self):
+        self.stats = {}  # location: LocationStats
+        self.pruned = time.time()
+        PRESENCE.watch(self.moved)
+
+    def _stats(self, location, now):
+        if now - self.pruned >= PRUNE_SECONDS:
+            self.prune(now)
+        stats = self.stats.get(location)
+        if stats is None:
+            stats = self.stats[location] = LocationStats()
+        return stats
+
+    def moved(self, character, old, new):
+        """Presence watcher: character went from old location to new, either of which may be None."""
+        now = time.time()
+        if old is not None:
+            self._stats(old, now).depart(character, now)
+        if new is not None:
+            self._stats(new, now).arrive(character, now)
+
+    def command(self, location, character, now=None):
+        """Count a command entered by character in location."""
+        if location is not None:
+            now = now or time.time()
+            self._stats(location, now).command(character, now)
+
+    def forget(self, location):
+        """Drop the counts of location, about to be deleted."""
+        self.stats.pop(location, None)
+
+    def prune(self, now=None):
+        """Drop the counts of locations with nobody present and nothing counted within a day. Returns how many."""
+        self.pruned = now = now or time.time()
+        expired = [location for location, stats in self.stats.items() if stats.expired(now)]
+        for location in expired:
+            del self.stats[location]
+        return len(expired)
+
+    def average_dwell(self, location, seconds=BINS * BIN_SECONDS, now=None):
+        """
+        Average seconds spent in location by those who left within the
+        last seconds, counting those still there up to now. None if nobody.
+        """
+        stats = self.stats.get(location)
+        if not stats:
+            return None
+        now = now or time.time()
+        slots = stats.slots(now, seconds)
+        total = sum(stats.dwell[index] for index in slots) + sum(now - since for since in stats.present.values())
+        count = sum(stats.departures[index] for index in slots) + len(stats.present)
+        return total / count if count else None
+
+    def peak(self, location, seconds=BINS * BIN_SECONDS, now=None):
+        """Most characters present at once in location within the last seconds."""
+        stats = self.stats.get(location)
+        if not stats:
+            return 0
+        slots = stats.slots(now or time.time(), seconds)
+        return max([stats.peak[index] for index in slots] + [len(stats.present)])
+
+    def arrivals(self, location, seconds=BINS * BIN_SECONDS, now=None):
+        """Arrivals in location within the last seconds."""
+        stats = self.stats.get(location)
+        if not stats:
+            return 0
+        return sum(stats.arrivals[index] for index in stats.slots(now or time.time(), seconds))
+
+    def most_active(self, location, count=3, seconds=BINS * BIN_SECONDS, now=None):
+        """Up to count characters who entered the most commands in location within the last seconds."""
+        stats = self.stats.get(location)
+        if not stats:
+            return []
+        totals = {}
+        for index in stats.slots(now or time.time(), seconds):
+            for character, commands in (stats.active[index] or {}).items():
+                totals[character] = totals.get(character, 0) + commands
+        return sorted(totals, key=lambda character: totals[character], reverse=True)[:count]
+
+
+OCCUPANCY = Occupancy()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Pathfinding
+
+Shortest routes between rooms over the exit graph. Breadth-first
+search is used in general; A* is used when both ends have coordinates
+in the spatial index, with straight-line distance as its estimate.
+A* routes assume one coordinate unit per step, so in maps where single
+exits span several units they are short, but not always the shortest.
+
+Every search has a budget: the largest number of rooms it may expand
+before giving up, which keeps the cost of a call predictable.
+"""
+import heapq
+from collections import deque
+from math import sqrt
+from world.exitgraph import EXIT_GRAPH
+from world.spatial import SPATIAL_INDEX
+
+BUDGET = 2000  # Default most rooms expanded in one search
+
+
+class Route(object):
+    """
+    Result of a search.
+
+    found (bool): True if the goal was reached.
+    steps (list): (way, room) pairs from start to goal, where way is
+        the Exit object or simple exit direction taken into room.
+    expanded (int): rooms expanded while searching.
+    exhausted (bool): True if the budget ran out before the goal.
+    """
+
+    def __init__(self, found=False, steps=None, expanded=0, exhausted=False):
+        self.found = found
+        self.steps = steps or []
+        self.expanded = expanded
+        self.exhausted = exhausted
+
+    def __len__(self):
+        return len(self.steps)
+
+    def first(self):
+        """The first (way, room) step, or None if already there or not found."""
+        return self.steps[0] if self.steps else None
+
+
+def room_of(obj):
+    """
+    The room holding obj, however deeply carried. Rooms are the only
+    objects without a location, so this follows locations upward.
+    """
+    while obj is not None and obj.location is not None:
+        obj = obj.location
+    return obj
+
+
+def _route(parents, goal, expanded):
+    """Walk parent links back from goal into a found Route."""
+    steps = []
+    node = goal
+    while parents[node] is not None:
+        previous, way = parents[node]
+        steps.append((way, node))
+        node = previous
+    steps.reverse()
+    return Route(True, steps, expanded)
+
+
+def bfs(start, goal, neighbours=EXIT_GRAPH.neighbours, budget=BUDGET, max_steps=None):
+    """
+    Breadth-first search from start to goal.
+    Args:
+        start, goal: rooms (or any hashable graph nodes).
+        neighbours (callable): node -> iterable of (way, node).
+        budget (int): most nodes expanded before giving up.
+        max_steps (int): longest route considered, or None.
+    Returns:
+        Route
+    """
+    parents = {start: None}
+    if start == goal:
+        return Route(True, [], 0)
+    depth = {start: 0}
+    queue = deque([start])
+    expanded = 0
+    while queue:
+        if expanded >= budget:
+            return Route(expanded=expanded, exhausted=True)
+        node = queue.popleft()
+        expanded += 1
+        if max_steps is not None and depth[node] >= max_steps:
+            continue
+        for way, nxt in neighbours(node):
+            if nxt in parents:
+                continue
+            parents[nxt] = (node, way)
+            if nxt == goal:
+                return _route(parents, goal, expanded)
+            depth[nxt] = depth[node] + 1
+            queue.append(nxt)
+    return Route(expanded=expanded)
+
+
+def astar(start, goal, neighbours=EXIT_GRAPH.neighbours, position=SPATIAL_INDEX.position,
+          budget=BUDGET, max_steps=None):
+    """
+    A* search from start to goal, estimating remaining steps by the
+    straight-line distance between positions. Nodes without a position
+    are estimated at 0, as breadth-first search would.
+    Args:
+        start, goal: rooms (or any hashable graph nodes).
+        neighbours (callable): node -> iterable of (way, node).
+        position (callable): node -> (x, y, z) or None.
+        budget (int): most nodes expanded before giving up.
+        max_steps (int): longest route considered, or None.
+    Returns:
+        Route
+    """
+    if start == goal:
+        return Route(True, [], 0)
+    target = position(goal)
+
+    def estimate(node):
+        here = position(node)
+        if not (here and target):
+            return 0
+        return sqrt((here[0] - target[0]) ** 2 + (here[1] - target[1]) ** 2 + (here[2] - target[2]) ** 2)
+
+    parents = {start: None}
+    cost = {start: 0}
+    closed = set()
+    counter = 0  # Tie-breaker, so nodes themselves are never compared.
+    heap = [(estimate(start), counter, start)]
+    expanded = 0
+    while heap:
+        node = heapq.heappop(heap)[2]
+        if node in closed:
+            continue
+        if node == goal:
+            return _route(parents, goal, expanded)
+        if expanded >= budget:
+            return Route(expanded=expanded, exhausted=True)
+        closed.add(node)
+        expanded += 1
+        steps = cost[node] + 1
+        if max_steps is not None and steps > max_steps:
+            continue
+        for way, nxt in neighbours(node):
+            if nxt in closed or steps >= cost.get(nxt, steps + 1):
+                continue
+            cost[nxt] = steps
+            parents[nxt] = (node, way)
+            counter += 1
+            heapq.heappush(heap, (steps + estimate(nxt), counter, nxt))
+    return Route(expanded=expanded)
+
+
+def find_path(start, goal, budget=BUDGET, max_steps=None,
+              neighbours=EXIT_GRAPH.neighbours, position=SPATIAL_INDEX.position):
+    """
+    Route from start to goal: A* when both have positions, else breadth-first.
+    Returns:
+        Route
+    """
+    if position(start) and position(goal):
+        return astar(start, goal, neighbours, position, budget, max_steps)
+    return bfs(start, goal, neighbours, budget, max_steps)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Presence index
+
+Which puppeted characters are in which location, kept current by the
+Character puppet and move hooks, so "is anyone here, and are they
+active?" does not need a scan of every connected session.
+
+Locations are whatever holds the character: usually a room, but an
+exit while travelling a path. Other indexes can `watch` it to hear of
+each change of location. Until the index first finds someone
+online it is rebuilt from the session handler when asked, which covers
+puppets restored by a reload without their puppet hooks being called;
+a rebuild tells no watchers, since nobody moved.
+
+The time of each session's latest command is kept as MuxCommand.at_post_cmd
+records it, so whether a location is active is read from the index
+rather than from the session handler.
+"""
+import time
+from weakref import WeakKeyDictionary
+
+
+class PresenceIndex(object):
+    """Puppeted characters by location, and the location of each."""
+
+    def __init__(self):
+        self.present = {}  # location: set of characters
+        self.location_of = {}  # character: location
+        self.last_seen = WeakKeyDictionary()  # session: time of its latest command
+        self.ready = False
+        self.watchers = []  # Called with (character, old location, new location) on each change.
+
+    def update(self, character):
+        """Record where character is, or forget it if no longer puppeted."""
+        old, new = self._place(character)
+        if old != new:
+            self._notify(character, old, new)
+
+    def _place(self, character):
+        """Move character to its location in the maps. Returns (old location, new location)."""
+        old = self.location_of.get(character)
+        new = character.location if character.has_account else None
+        if old is not None and old != new:
+            here = self.present.get(old)
+            if here is not None:
+                here.discard(character)
+                if not here:
+                    del self.present[old]
+        if new is None:
+            self.location_of.pop(character, None)
+        else:
+            self.location_of[character] = new
+            self.present.setdefault(new, set()).add(character)
+        return old, new
+
+    def remove(self, character):
+        """Forget character, wherever it was."""
+        old = self.location_of.pop(character, None)
+        here = self.present.get(old)
+        if here is not None:
+            here.discard(character)
+            if not here:
+                del self.present[old]
+        if old is not None:
+            self._notify(character, old, None)
+
+    def _notify(self, character, old, new):
+        for watcher in self.watchers:
+            watcher(character, old, new)
+
+    def watch(self, callback):
+        """Have callback(character, old, new) called whenever a puppeted character changes location."""
+        if callback not in self.watchers:
+            self.watchers.append(callback)
+
+    def characters(self, location):
+        """Puppeted characters in location."""
+        if not self.ready:
+            self.rebuild()
+        return self.present.get(location, ())
+
+    def occupied(self, location):
+        """True if any puppeted character is in location."""
+        if not self.ready:
+            self.rebuild()
+        return location in self.present
+
+    def puppets(self):
+        """Every puppeted character."""
+        if not self.ready:
+            self.rebuild()
+        return list(self.location_of)
+
+    def command(self, session, now=None):
+        """Record a command entered by session."""
+        self.last_seen[session] = now or time.time()
+
+    def last_command(self, character):
+        """
+        Time of the latest command from any of character's sessions, or 0.
+        Sessions with no command recorded since the server started count
+        their latest visible command.
+        """
+        sessions = character.sessions.all()
+        return max(self.last_seen.get(session, session.cmd_last_visible) for session in sessions) if sessions else 0
+
+    def last_active(self, location):
+        """Time of the latest visible command by anyone in location, or 0."""
+        return max([self.last_command(each) for each in self.characters(location)] or [0])
+
+    def rebuild(self):
+        """Index every puppet of the connected sessions, without telling watchers."""
+        from evennia.server.sessionhandler import SESSIONS
+        self.present.clear()
+        self.location_of.clear()
+        for session in SESSIONS.get_sessions():
+            puppet = session.get_puppet()
+            if session.logged_in and puppet:
+                self._place(puppet)
+        self.ready = bool(self.location_of)
+        return len(self.location_of)
+
+
+PRESENCE = PresenceIndex()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Render context
+
+Display names worked out once per command. While a command runs,
+Tangible.get_display_name looks up each (object, viewer, options) in the
+command's render context before working the name out, and the context
+resolves each viewer (an account becomes its puppet) and its quell
+state once. A room look, a glance, the who list and movement
+announcements made in the same command all share it.
+
+MuxCommand runs each command's func inside a context, ended in a finally
+clause even when func raises; commands run from inside a command share
+the outer one. A context older than MAX_AGE counts as ended. Whatever
+changes a pose within a command calls `RENDER.forget(obj)`; a change of
+key is seen without it.
+
+Outside a command, names are worked out on every call as before.
+"""
+import time
+from evennia.utils import inherits_from
+
+MAX_AGE = 2  # Seconds a context is used before a new one replaces it
+
+
+def resolve_viewer(viewer):
+    """
+    The tangible a name is displayed to, and whether its account is quelled.
+    Returns:
+        (viewer, quelled): viewer is None, or an object without an account,
+        for viewers seeing only plain styled names.
+    """
+    if inherits_from(viewer, "evennia.accounts.accounts.DefaultAccount"):
+        viewer = viewer.get_puppet(viewer.sessions.all()[0])  # viewer is an Account, convert to tangible
+    if not (viewer and viewer.has_account):
+        return viewer, False
+    return viewer, viewer.account.attributes.has('_quell')
+
+
+class RenderContext(object):
+    """Viewers resolved and names displayed within one command."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.viewers = {}  # viewer as given: (viewer, quelled)
+        self.names = {}  # (object, key, viewer, options): display name
+        self.hits = self.misses = 0
+
+    def viewer(self, viewer):
+        """Resolved viewer and quell state, as resolve_viewer, worked out once."""
+        resolved = self.viewers.get(viewer)
+        if resolved is None:
+            resolved = self.viewers[viewer] = resolve_viewer(viewer)
+        return resolved
+
+    def name(self, obj, viewer, options):
+        """Display name of obj seen by viewer with get_display_name options, worked out once."""
+        viewer, quelled = self.viewer(viewer)
+        key = (obj, obj.key, viewer, tuple(sorted(options.items())))
+        name = self.names.get(key)
+        if name is None:
+            name = self.names[key] = obj.display_name_for(viewer, quelled, **options)
+            self.misses += 1
+        else:
+            self.hits += 1
+        return name
+
+    def forget(self, obj):
+        """Drop the names kept for obj."""
+        for key in [key for key in self.names if key[0] == obj]:
+            del self.names[key]
+
+
+class RenderScope(object):
+    """The render context of the command running now, if any."""
+
+    def __init__(self):
+        self.context = None
+        self.depth = 0
+
+    def begin(self):
+        """A command starts: use its render context, or the running command's."""
+        if not self.current():
+            self.context = RenderContext()
+        self.depth += 1
+
+    def end(self):
+        """A command finished: drop its render context unless inside another command."""
+        self.depth = max(0, self.depth - 1)
+        if not self.depth:
+            self.context = None
+
+    def current(self):
+        """The render context in use, or None. A context past MAX_AGE is ended instead."""
+        context = self.context
+        if context and time.time() - context.started < MAX_AGE:
+            return context
+        self.context, self.depth = None, 0
+        return None
+
+    def forget(self, obj):
+        """Drop names kept for obj, after its pose changed."""
+        if self.context:
+            self.context.forget(obj)
+
+
+RENDER = RenderScope()
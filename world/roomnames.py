@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Room name index
+
+Lower-cased keys and aliases of every room (settings.BASE_ROOM_TYPECLASS
+and its children) in one sorted list, so a prefix lookup is a binary
+search rather than a database query. The index is loaded from the
+database the first time it is asked, and kept current after that by
+database signals: saving a room (creating or renaming it), changing its
+alias tags, and deleting it.
+
+The signals are connected at server start, by `ROOM_NAMES.connect()`.
+"""
+from bisect import bisect_left, insort
+
+
+def fold(name):
+    """Lower-cased form of name used for matching."""
+    return name.strip().lower()
+
+
+class RoomNames(object):
+    """Sorted (folded name, room id) entries, and the rooms they belong to."""
+
+    def __init__(self):
+        self.entries = []  # Sorted list of (folded name, room id)
+        self.names = {}  # room id: set of folded names
+        self.rooms = {}  # room id: room
+        self.ready = False
+
+    @staticmethod
+    def _is_object(obj):
+        from evennia.objects.models import ObjectDB
+        return isinstance(obj, ObjectDB)
+
+    def _is_room(self, obj):
+        from django.conf import settings
+        from evennia.utils.utils import inherits_from
+        return self._is_object(obj) and obj.db_location is None and inherits_from(obj, settings.BASE_ROOM_TYPECLASS)
+
+    def _set(self, room, names):
+        """Index room under names, replacing the names it had."""
+        names = set(fold(name) for name in names if name and name.strip())
+        old = self.names.get(room.id, set())
+        for name in old - names:
+            index = bisect_left(self.entries, (name, room.id))
+            if index < len(self.entries) and self.entries[index] == (name, room.id):
+                del self.entries[index]
+        for name in names - old:
+            insort(self.entries, (name, room.id))
+        self.names[room.id] = names
+        self.rooms[room.id] = room
+
+    def update(self, room):
+        """Index room's current key and aliases."""
+        if self.ready:
+            self._set(room, [room.key] + list(room.aliases.all()))
+
+    def remove(self, room_id):
+        """Forget the room with room_id."""
+        for name in self.names.pop(room_id, ()):
+            index = bisect_left(self.entries, (name, room_id))
+            if index < len(self.entries) and self.entries[index] == (name, room_id):
+                del self.entries[index]
+        self.rooms.pop(room_id, None)
+
+    def find(self, prefix):
+        """Rooms with a key or alias starting with prefix, ignoring case, in name order."""
+        if not self.ready:
+            self.rebuild()
+        prefix = fold(prefix)
+        found = []
+        for name, room_id in self.entries[bisect_left(self.entries, (prefix,)):]:
+            if not name.startswith(prefix):
+                break
+            room = self.rooms[room_id]
+            if room not in found:
+                found.append(room)
+        return found
+
+    def rebuild(self):
+        """Load every room's key and aliases from the database. Returns the number of rooms."""
+        from django.conf import settings
+        from evennia.typeclasses.tags import Tag
+        from evennia.utils.utils import class_from_module
+        rooms = class_from_module(settings.BASE_ROOM_TYPECLASS).objects.all_family()
+        self.entries, self.names, self.rooms = [], {}, {}
+        names = dict((room.id, [room.key]) for room in rooms)
+        self.rooms = dict((room.id, room) for room in rooms)
+        aliases = Tag.objects.filter(db_tagtype='alias', objectdb__in=list(names.keys()))\
+            .values_list('db_key', 'objectdb')
+        for alias, room_id in aliases:
+            names[room_id].append(alias)
+        for room_id, keys in names.items():
+            self.names[room_id] = set(fold(name) for name in keys if name and name.strip())
+            self.entries.extend((name, room_id) for name in self.names[room_id])
+        self.entries.sort()
+        self.ready = True
+        return len(self.rooms)
+
+    def saved(self, sender, instance, **kwargs):
+        """Django post_save receiver: a room was created or renamed."""
+        if self.ready and self._is_room(instance):
+            self.update(instance)
+
+    def tags_changed(self, sender, instance, action, **kwargs):
+        """Django m2m_changed receiver for object tags: aliases may have changed."""
+        if self.ready and action in ('post_add', 'post_remove', 'post_clear') and self._is_object(instance) and\
+                instance.id in self.rooms:
+            self.update(instance)
+
+    def deleted(self, sender, instance, **kwargs):
+        """Django post_delete receiver: a room was deleted."""
+        if self._is_object(instance) and instance.id in self.rooms:
+            self.remove(instance.id)
+
+    def connect(self):
+        """Connect the receivers that keep the index current."""
+        from django.db.models.signals import m2m_changed, post_delete, post_save
+        from evennia.objects.models import ObjectDB
+        # Saves and deletes are sent by each typeclass, a proxy of ObjectDB, so are not filtered by sender.
+        post_save.connect(self.saved, dispatch_uid='room_names_saved')
+        m2m_changed.connect(self.tags_changed, sender=ObjectDB.db_tags.through, dispatch_uid='room_names_tags')
+        post_delete.connect(self.deleted, dispatch_uid='room_names_deleted')
+
+
+ROOM_NAMES = RoomNames()
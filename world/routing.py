@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Routing tables
+
+Next-hop tables for rooms grouped by their 'zone' tag (or 'area' tag
+when they have no zone), as set with the zone command. Within a zone
+each room has an integer index, and for every destination an array
+holds, per starting room, the index of the next room to step into, so
+"which way to X from here" is two lookups.
+
+Tables are built by the routing script (typeclasses.scripts.RoutingScript).
+When the exit graph forgets a room, that room's zone is marked dirty and
+its tables are skipped until the script rebuilds that zone alone. Each
+refresh also loads zone membership again, so new rooms, new zones and
+changed zone tags are picked up, and zones whose rooms changed are
+rebuilt too. A refresh runs cooperatively in the reactor, a little at a
+time between other work, so a large zone cannot stall the server while
+it is rebuilt.
+"""
+from array import array
+from collections import deque
+from world.exitgraph import EXIT_GRAPH
+
+ZONE_CATEGORIES = ('zone', 'area')  # Tag categories grouping rooms, in order of preference
+NO_HOP = -1
+STEP_ROOMS = 500  # Rooms of table building done before yielding to the reactor
+
+
+class ZoneTable(object):
+    """Next-hop table of one zone."""
+
+    def __init__(self, rooms):
+        self.rooms = list(rooms)
+        self.index = dict((room, i) for i, room in enumerate(self.rooms))
+        self.hops = []  # hops[destination][source] = next room index, or NO_HOP
+
+    def build(self, neighbours=EXIT_GRAPH.neighbours):
+        """Compute every next hop at once."""
+        for _ in self.steps(neighbours):
+            pass
+        return self
+
+    def steps(self, neighbours=EXIT_GRAPH.neighbours):
+        """
+        Compute every next hop by one breadth-first search per destination
+        over reversed exits, yielding after every STEP_ROOMS rooms of work.
+        """
+        size = len(self.rooms)
+        inbound = [[] for _ in range(size)]
+        for source, room in enumerate(self.rooms):
+            for way, destination in neighbours(room):
+                target = self.index.get(destination)
+                if target is not None and source not in inbound[target]:
+                    inbound[target].append(source)
+            if source % STEP_ROOMS == STEP_ROOMS - 1:
+                yield
+        hops_all, work = [], 0
+        for goal in range(size):
+            hops = array('i', [NO_HOP]) * size
+            hops[goal] = goal
+            queue = deque([goal])
+            while queue:
+                node = queue.popleft()
+                for source in inbound[node]:
+                    if hops[source] == NO_HOP:
+                        hops[source] = node
+                        queue.append(source)
+            hops_all.append(hops)
+            work += size
+            if work >= STEP_ROOMS:
+                work = 0
+                yield
+        self.hops = hops_all
+
+    def next_room(self, here, there):
+        """The next room on the way from here to there, or None."""
+        source, goal = self.index.get(here), self.index.get(there)
+        if source is None or goal is None or source == goal:
+            return None
+        step = self.hops[goal][source]
+        return self.rooms[step] if step != NO_HOP else None
+
+
+class RoutingTables(object):
+    """Zone tables, and the zone of each room."""
+
+    def __init__(self):
+        self.tables = {}  # (category, key): ZoneTable
+        self.zone_of = {}  # room: (category, key)
+        self.dirty = set()  # Zones whose exits changed since their table was built
+        self.building = set()  # Zones being rebuilt by the running refresh
+        self.task = None  # Running refresh
+        EXIT_GRAPH.watch(self.mark_dirty)
+
+    def mark_dirty(self, room):
+        """Called when the exits of room change. Rooms in no zone yet are found by the next refresh."""
+        zone = self.zone_of.get(room)
+        if zone is not None:
+            self.dirty.add(zone)
+
+    def zones(self):
+        """Load zone membership from the database as {zone: [room, ...]}."""
+        from evennia.objects.models import ObjectDB
+        from evennia.typeclasses.tags import Tag
+        tags = Tag.objects.filter(db_category__in=ZONE_CATEGORIES, objectdb__isnull=False)\
+            .values_list('db_category', 'db_key', 'objectdb')
+        zone_ids = {}
+        for category, key, room_id in tags:
+            if room_id not in zone_ids or category == ZONE_CATEGORIES[0]:
+                zone_ids[room_id] = (category, key)
+        members = {}
+        for room in ObjectDB.objects.filter(id__in=zone_ids.keys(), db_location__isnull=True):
+            members.setdefault(zone_ids[room.id], []).append(room)
+        return members
+
+    def rebuild(self):
+        """Rebuild every zone's table at once. Returns the number of zones."""
+        self.tables, self.zone_of, self.dirty = {}, {}, set()
+        for _ in self._refresh_steps():
+            pass
+        return len(self.tables)
+
+    def refresh(self):
+        """
+        Start rebuilding, cooperatively, the tables of zones whose exits or
+        rooms changed, unless a refresh is already running.
+        Returns:
+            Deferred fired when done, or None if one was running.
+        """
+        from twisted.internet import task
+        if self.task is not None:
+            return None
+        self.task = task.cooperate(self._refresh_steps())
+        done = self.task.whenDone()
+        done.addBoth(self._refreshed)
+        return done
+
+    def _refreshed(self, result):
+        self.task = None
+        self.building.clear()
+        return result
+
+    def _refresh_steps(self):
+        """Load zone membership again, then rebuild changed zones one by one, yielding as they build."""
+        members = self.zones()
+        for zone in [zone for zone in self.tables if zone not in members]:
+            del self.tables[zone]
+        for zone, rooms in members.items():
+            table = self.tables.get(zone)
+            if table is None or set(table.rooms) != set(rooms):
+                self.dirty.add(zone)
+        self.zone_of = dict((room, zone) for zone, rooms in members.items() for room in rooms)
+        self.building, self.dirty = self.dirty & set(members), set()
+        for zone in list(self.building):
+            table = ZoneTable(members[zone])
+            for _ in table.steps():
+                yield
+            self.tables[zone] = table
+            self.building.discard(zone)
+
+    def next_hop(self, here, there):
+        """
+        The way out of here toward there, when both share a zone with a
+        current table.
+        Returns:
+            (way, room) where way is an Exit object or simple exit direction,
+            or None if there is no table answer.
+        """
+        zone = self.zone_of.get(here)
+        if zone is None or zone in self.dirty or zone in self.building or zone not in self.tables or\
+                self.zone_of.get(there) != zone:
+            return None
+        step = self.tables[zone].next_room(here, there)
+        if step is None:
+            return None
+        for way, destination in EXIT_GRAPH.neighbours(here):
+            if destination == step:
+                return way, step
+        return None
+
+    def route(self, here, there, max_steps=100):
+        """Every (way, room) step from here to there by the tables, or None."""
+        steps = []
+        while here != there and len(steps) < max_steps:
+            hop = self.next_hop(here, there)
+            if hop is None:
+                return None
+            steps.append(hop)
+            here = hop[1]
+        return steps if here == there else None
+
+
+ROUTES = RoutingTables()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Spatial index
+
+Process-wide index of Room coordinates, so point lookups and radius
+searches do not need to join the coordinate tags in the database.
+Rooms are kept in a dictionary keyed by exact (x, y, z) position for
+point lookups, and in coarse grid buckets of BUCKET_SIZE cells per
+side for radius searches.
+
+The index is built at server start by `SPATIAL_INDEX.rebuild()` and kept
+current by the Room `coord`, `x`, `y` and `z` property setters.
+
+In the database each room's position is a single tag in the COORD_CATEGORY
+category, packed by `pack_coord` so that keys sort by x, then y, then z.
+Rooms still holding the older coordx, coordy and coordz tags are read as
+before until moved to the packed tag with `@coord/migrate`.
+"""
+from math import sqrt
+
+BUCKET_SIZE = 8  # Cells per side of each bucket used in radius searches.
+COORD_CATEGORY = 'coord'  # Tag category of the packed coordinate
+LEGACY_CATEGORIES = ('coordx', 'coordy', 'coordz')  # Tag categories of unpacked coordinates
+COORD_OFFSET = 5000000  # Shifts coordinates positive so packed keys sort numerically
+COORD_FORMAT = '%07d,%07d,%07d'
+
+
+def pack_coord(x, y, z):
+    """Pack (x, y, z) into one fixed-width tag key that sorts in coordinate order."""
+    return COORD_FORMAT % (int(x) + COORD_OFFSET, int(y) + COORD_OFFSET, int(z) + COORD_OFFSET)
+
+
+def unpack_coord(key):
+    """Return the (x, y, z) tuple held in a packed tag key."""
+    return tuple(int(each) - COORD_OFFSET for each in key.split(','))
+
+
+class SpatialIndex(object):
+    """
+    Index of room positions. Rooms are stored by reference, and may
+    share a position with other rooms.
+    """
+
+    def __init__(self, bucket_size=BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.points = {}  # (x, y, z): [room, ...]
+        self.buckets = {}  # (bx, by, bz): set of (x, y, z)
+        self.positions = {}  # room: (x, y, z)
+        self.ready = False
+
+    def _bucket(self, coord):
+        """Bucket key holding the given coordinate."""
+        size = self.bucket_size
+        return int(coord[0] // size), int(coord[1] // size), int(coord[2] // size)
+
+    def add(self, room, coord):
+        """
+        Place room at coord, replacing any previous position of room.
+        Args:
+            room (Room): the room being placed.
+            coord (tuple): (x, y, z) integers, or None to remove room.
+        """
+        self.remove(room)
+        if coord is None or None in coord:
+            return
+        coord = tuple(int(c) for c in coord)
+        rooms = self.points.get(coord)
+        if rooms is None:
+            self.points[coord] = [room]
+            self.buckets.setdefault(self._bucket(coord), set()).add(coord)
+        else:
+            rooms.append(room)
+        self.positions[room] = coord
+
+    def remove(self, room):
+        """Remove room from the index, if it is there."""
+        coord = self.positions.pop(room, None)
+        if coord is None:
+            return
+        rooms = self.points.get(coord, [])
+        if room in rooms:
+            rooms.remove(room)
+        if not rooms:
+            self.points.pop(coord, None)
+            bucket = self.buckets.get(self._bucket(coord))
+            if bucket is not None:
+                bucket.discard(coord)
+                if not bucket:
+                    del self.buckets[self._bucket(coord)]
+
+    def position(self, room):
+        """Return the indexed (x, y, z) of room, or None."""
+        return self.positions.get(room)
+
+    def room_at(self, x, y, z):
+        """Return the first room at the given position, or None."""
+        rooms = self.points.get((x, y, z))
+        return rooms[0] if rooms else None
+
+    def rooms_around(self, x, y, z, distance):
+        """
+        Rooms within distance of (x, y, z).
+        Returns:
+            A list of (distance, room) tuples, closest first.
+        """
+        low = self._bucket((x - distance, y - distance, z - distance))
+        high = self._bucket((x + distance, y + distance, z + distance))
+        limit = distance * distance
+        found = []
+        for bx in range(low[0], high[0] + 1):
+            for by in range(low[1], high[1] + 1):
+                for bz in range(low[2], high[2] + 1):
+                    for coord in self.buckets.get((bx, by, bz), ()):
+                        square = (coord[0] - x) ** 2 + (coord[1] - y) ** 2 + (coord[2] - z) ** 2
+                        if square <= limit:
+                            away = sqrt(square)
+                            found.extend((away, room) for room in self.points[coord])
+        found.sort(key=lambda tup: tup[0])
+        return found
+
+    def clear(self):
+        """Empty the index."""
+        self.points.clear()
+        self.buckets.clear()
+        self.positions.clear()
+        self.ready = False
+
+    def rebuild(self):
+        """
+        Load every room holding coordinate tags from the database.
+        Returns:
+            The number of rooms indexed.
+        """
+        from evennia.objects.models import ObjectDB
+        from evennia.typeclasses.tags import Tag
+        self.clear()
+        packed = dict(Tag.objects.filter(db_category=COORD_CATEGORY, objectdb__isnull=False)
+                      .values_list('objectdb', 'db_key'))
+        for room in ObjectDB.objects.filter(id__in=packed.keys()):
+            self.add(room, unpack_coord(packed[room.id]))
+        for room in ObjectDB.objects.filter(db_tags__db_category=LEGACY_CATEGORIES[0]).distinct():
+            if room.id not in packed:
+                self.add(room, room.coord)
+        self.ready = True
+        return len(self.positions)
+
+
+SPATIAL_INDEX = SpatialIndex()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Speech name index
+
+Names that `/name` substitutions in say and pose can refer to, per
+container: the container itself and its contents, and for a location
+also its recent visitors. Each key, each word of a key and each alias
+is lower-cased (roomnames.fold) and kept in one sorted list, so a
+prefix lookup is a binary search instead of a fuzzy object search.
+
+An index is built the first time a container is spoken in, and dropped
+when something arrives or leaves (Tangible.at_object_receive and
+at_object_leave), or when an object is saved or has its aliases
+changed (a rename), by the signals connected at server start with
+`SPEECH_NAMES.connect()`. An index is also built again when any of the
+contents it was built from is gone or elsewhere, as after eating or
+deleting something, which calls no move hooks.
+
+A word names the object with exactly that name in any index first,
+then the first object whose name it begins, in the speaker's own
+index before the location's.
+"""
+from bisect import bisect_left
+from world.roomnames import fold
+
+VISITORS = 20  # Recent visitors of a location counted among its names
+
+
+class SpeechNames(object):
+    """Sorted (lower-cased name, rank, id, object) entries per container."""
+
+    def __init__(self):
+        self.indexes = {}  # container: (contents indexed, sorted list of (lower-cased name, rank, id, object))
+
+    def forget(self, container):
+        """Drop the index of container."""
+        self.indexes.pop(container, None)
+
+    def index(self, container):
+        """Sorted (lower-cased name, rank, id, object) entries of container, kept while its contents stay."""
+        kept = self.indexes.get(container)
+        if kept and all(obj.pk and obj.location == container for obj in kept[0]):
+            return kept[1]
+        contents = container.contents
+        objects = [container] + contents
+        if container.location is None and hasattr(container, 'visits'):
+            objects += container.visits.recent(VISITORS)
+        entries, seen = [], set()
+        for obj in objects:
+            if not obj or obj in seen:
+                continue
+            seen.add(obj)
+            names = dict((fold(word), 1) for word in obj.key.split()[1:])
+            names.update((fold(name), 0) for name in [obj.key] + obj.aliases.all())
+            entries += [(name, rank, obj.id, obj) for name, rank in names.items() if name]
+        entries.sort(key=lambda entry: entry[:3])
+        self.indexes[container] = (contents, entries)
+        return entries
+
+    @staticmethod
+    def _find(entries, word):
+        """(exact, first): the object named word exactly, and the first whose name word begins, or None."""
+        at = bisect_left(entries, (word,))
+        if at == len(entries) or not entries[at][0].startswith(word):
+            return None, None
+        name, _, _, first = entries[at]
+        return (first if name == word else None), first
+
+    def resolve(self, puppet, words):
+        """
+        Objects named by each of words, for puppet speaking.
+        An exact name anywhere wins; otherwise a prefix match in puppet and
+        its inventory comes before one in its location.
+        Returns:
+            {word: object} of the words that name something.
+        """
+        indexes = [self.index(puppet)] + ([self.index(puppet.location)] if puppet.location else [])
+        found = {}
+        for word in words:
+            folded = fold(word)
+            if not folded or word in found:
+                continue
+            matches = [self._find(entries, folded) for entries in indexes]
+            match = next((exact for exact, _ in matches if exact), None) or\
+                next((first for _, first in matches if first), None)
+            if match:
+                found[word] = match
+        return found
+
+    def changed(self, sender, instance, **kwargs):
+        """Receiver for saves and alias changes: drop the indexes naming instance."""
+        if self.indexes and hasattr(instance, 'db_location'):
+            self.forget(instance)
+            self.forget(instance.db_location)
+
+    def connect(self):
+        """Connect the receivers that drop indexes on renames."""
+        from django.db.models.signals import m2m_changed, post_save
+        from evennia.objects.models import ObjectDB
+        # Saves are sent by each typeclass, a proxy of ObjectDB, so are not filtered by sender.
+        post_save.connect(self.changed, dispatch_uid='speech_names_saved')
+        m2m_changed.connect(self.changed, sender=ObjectDB.db_tags.through, dispatch_uid='speech_names_tags')
+
+
+SPEECH_NAMES = SpeechNames()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Trizbort map importer
+
+Builds rooms and exits from the Trizbort XML maps in world/buildmaps.
+The map is read with an incremental parser, so it is never held in
+memory whole, and rooms are created in batches, one database
+transaction per batch, from the ROOM and EXIT prototypes.
+
+Each room gets a packed coordinate tag from its map x and y position
+(divided by the map grid scale), an 'area' tag naming the map, and a
+'zone' tag from its Trizbort region, unless the region is Trizbort's
+NoRegion placeholder, which rooms of unrelated maps share. Connections labelled only with a
+compass direction, or not labelled, become simple exits; connections
+with other names or aliases become Exit objects.
+"""
+import os
+from xml.etree.ElementTree import iterparse
+from world.exitgraph import SIMPLE_DIRECTIONS
+from world.prototypes import ROOM, EXIT
+from world.spatial import COORD_CATEGORY, pack_coord
+
+BATCH_SIZE = 200  # Rooms or connections created per transaction
+SCALE = 32  # Trizbort map units per coordinate step
+NO_REGION = 'NoRegion'  # Trizbort's region of rooms not placed in one
+SHORT_DIRECTIONS = dict((v, k) for k, v in SIMPLE_DIRECTIONS.items())
+BACK_DIRECTIONS = {'n': 's', 's': 'n', 'e': 'w', 'w': 'e', 'nw': 'se', 'se': 'nw',
+                   'ne': 'sw', 'sw': 'ne', 'u': 'd', 'd': 'u'}
+
+
+def port_direction(port):
+    """Compass direction of a Trizbort dock port, such as 'nnw' -> 'n'."""
+    port = (port or '').lower()
+    if port in BACK_DIRECTIONS:
+        return port
+    return port[:1] if port[:1] in BACK_DIRECTIONS else None
+
+
+def exit_names(text, port):
+    """
+    Names of the exit a connection end leads out of, from its label text
+    or else its dock port.
+    Returns:
+        (direction, names) where direction is a simple exit direction when
+        the end is a plain compass direction or None, and names is a list
+        of key and aliases.
+    """
+    names = [name.strip() for name in (text or '').split(';') if name.strip()]
+    if not names:
+        direction = port_direction(port)
+        return direction, [SIMPLE_DIRECTIONS[direction]] if direction else []
+    first = names[0].lower()
+    direction = first if first in SIMPLE_DIRECTIONS else SHORT_DIRECTIONS.get(first)
+    return (direction if len(names) == 1 else None), names
+
+
+def read_map(path):
+    """
+    Stream a Trizbort map.
+    Yields:
+        ('room', dict) for each room and ('line', dict) for each connection
+        with both ends docked. Line dicts hold 'start', 'end', 'start_port',
+        'end_port', 'start_text', 'end_text' and 'one_way'.
+    """
+    in_map = False
+    for event, element in iterparse(path, events=('start', 'end')):
+        tag = element.tag
+        if event == 'start':
+            if tag == 'map':
+                in_map = True
+            continue
+        if tag == 'map':
+            in_map = False
+        elif in_map and tag == 'room':
+            yield 'room', dict(element.attrib)
+            element.clear()
+        elif in_map and tag == 'line':
+            docks = dict((dock.get('index'), dock.attrib) for dock in element.findall('dock'))
+            if '0' in docks and '1' in docks:
+                yield 'line', {'start': docks['0'].get('id'), 'end': docks['1'].get('id'),
+                               'start_port': docks['0'].get('port'), 'end_port': docks['1'].get('port'),
+                               'start_text': element.get('startText'), 'end_text': element.get('endText'),
+                               'one_way': element.get('flow') == 'oneWay'}
+            element.clear()
+
+
+def room_prototype(room, area, scale=SCALE):
+    """ROOM prototype for a Trizbort room dict."""
+    coord = (int(float(room.get('x', 0))) // scale, int(float(room.get('y', 0))) // scale, 0)
+    tags = [(pack_coord(*coord), COORD_CATEGORY, None), (area, 'area', None)]
+    region = (room.get('region') or '').strip()
+    if region and region != NO_REGION:
+        tags.append((region, 'zone', None))
+    prototype = dict(ROOM, key=room.get('name') or 'Room %s' % room.get('id'), tags=tags)
+    if room.get('description'):
+        prototype['desc'] = room['description'].replace('\r\n', '|/')
+    return prototype, coord
+
+
+def import_map(path, batch=BATCH_SIZE, scale=SCALE, report=None):
+    """
+    Create the rooms and exits of the Trizbort map at path.
+    Args:
+        path (str): map file.
+        batch (int): rooms or connections per transaction.
+        scale (int): map units per coordinate step.
+        report (callable): called with progress strings.
+    Returns:
+        (rooms, simple exits, exit objects) counts created.
+    """
+    from django.db import transaction
+    from evennia.prototypes.spawner import spawn
+    from world.exitgraph import EXIT_GRAPH
+    from world.spatial import SPATIAL_INDEX
+    report = report or (lambda text: None)
+    area = os.path.splitext(os.path.basename(path))[0]
+    rooms, pending, lines = {}, [], []
+
+    def flush():
+        if not pending:
+            return
+        with transaction.atomic():
+            created = spawn(*[prototype for _, prototype, _ in pending])
+        for (room_id, _, coord), room in zip(pending, created):
+            rooms[room_id] = room
+            SPATIAL_INDEX.add(room, coord)
+        report('Created %i rooms.' % len(rooms))
+        del pending[:]
+
+    for kind, data in read_map(path):
+        if kind == 'room':
+            prototype, coord = room_prototype(data, area, scale)
+            pending.append((data.get('id'), prototype, coord))
+            if len(pending) >= batch:
+                flush()
+        else:
+            lines.append(data)
+    flush()
+    ways = []  # (source, destination, direction, names)
+    for line in lines:
+        start, end = rooms.get(line['start']), rooms.get(line['end'])
+        if not (start and end):
+            continue
+        ways.append((start, end) + exit_names(line['start_text'], line['start_port']))
+        if not line['one_way']:
+            ways.append((end, start) + exit_names(line['end_text'], line['end_port']))
+    simple, objects = 0, 0
+    for first in range(0, len(ways), batch):
+        exits, prototypes = {}, []
+        for source, destination, direction, names in ways[first:first + batch]:
+            if direction:
+                exits.setdefault(source, {})[direction] = destination
+            elif names:
+                prototypes.append(dict(EXIT, key=names[0], aliases=names[1:],
+                                       location=source, destination=destination))
+        with transaction.atomic():
+            for source, new_exits in exits.items():
+                source.db.exits = dict(source.db.exits or {}, **new_exits)
+                simple += len(new_exits)
+            if prototypes:
+                spawn(*prototypes)
+                objects += len(prototypes)
+        EXIT_GRAPH.invalidate(*exits.keys())  # Spawned exit objects invalidate their rooms when saved.
+        report('Connected %i simple exits and %i exit objects.' % (simple, objects))
+    return len(rooms), simple, objects
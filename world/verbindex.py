@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Verb index
+
+The verbs an object responds to are the access types of its locks,
+with any `v-` prefix dropped from the name. Each distinct lock string
+is parsed once into a table of (access type, verb) pairs, shared by
+every object with the same locks, so an object's table changes only
+when its locks do.
+
+Each location also keeps a registry, verb -> [(object, access type)],
+of itself and its contents, built from the tables the first time it is
+asked. Tangible.at_object_receive and at_object_leave drop the registry
+of the location, and a registry is built again when any object in it
+has had its locks changed since, or has been deleted or is no longer
+there, as after eating or destroying something, which calls no move
+hooks. CmdTry and `sense` ask it which verbs
+are available here and which objects respond to a verb, leaving only
+the lock check itself to do per object.
+"""
+
+_TABLES = {}  # lock string: ((access type, verb), ...)
+
+
+def verb_table(obj):
+    """(access type, verb) pairs for the locks of obj, parsed once per lock string."""
+    storage = obj.lock_storage or ''
+    table = _TABLES.get(storage)
+    if table is None:
+        entries = []
+        for lock in storage.split(';'):
+            access_type = lock.split(':')[0].strip()
+            if access_type:
+                entries.append((access_type, access_type[2:] if access_type[:2] == 'v-' else access_type))
+        table = _TABLES[storage] = tuple(entries)
+    return table
+
+
+class VerbIndex(object):
+    """Verb registries of locations."""
+
+    def __init__(self):
+        self.registries = {}  # location: (locks {object: lock string}, verbs {verb: [(object, access type)]})
+
+    def forget(self, location):
+        """Drop the registry of location, after something arrived or left."""
+        self.registries.pop(location, None)
+
+    def registry(self, location):
+        """verb: [(object, access type)] for location and its contents."""
+        kept = self.registries.get(location)
+        if kept:
+            locks, verbs = kept
+            if all(obj.pk and (obj == location or obj.location == location) and obj.lock_storage == storage
+                   for obj, storage in locks.items()):
+                return verbs
+        locks, verbs = {}, {}
+        for obj in [location] + location.contents:
+            locks[obj] = obj.lock_storage
+            for access_type, verb in verb_table(obj):
+                verbs.setdefault(verb, []).append((obj, access_type))
+        self.registries[location] = (locks, verbs)
+        return verbs
+
+    def _registries(self, char):
+        """Registries of char's surroundings: its location and its inventory."""
+        here = char.location
+        return [self.registry(here), self.registry(char)] if here else [self.registry(char)]
+
+    def available(self, char, exclude=()):
+        """Verbs char may use on anything nearby, excluding access types in exclude."""
+        found = set()
+        for verbs in self._registries(char):
+            for verb, entries in verbs.items():
+                if verb not in found and any(access_type not in exclude and obj.access(char, access_type)
+                                             for obj, access_type in entries):
+                    found.add(verb)
+        return list(found)
+
+    def responders(self, char, verb):
+        """Objects nearby that char may use verb on."""
+        found = []
+        for verbs in self._registries(char):
+            for obj, access_type in verbs.get(verb, ()):
+                if obj not in found and obj.access(char, access_type):
+                    found.append(obj)
+        return found
+
+    def verbs_of(self, obj, char, exclude=()):
+        """(verb, allowed) for each verb of obj, allowed when char passes its lock."""
+        return [(verb, obj.access(char, access_type)) for access_type, verb in verb_table(obj)
+                if access_type not in exclude]
+
+
+VERBS = VerbIndex()
@@ -4,6 +4,7 @@ class Verb
 
 """
 from world.helpers import escape_braces
+from world.groups import GROUPS
 
 
 class VerbHandler:
@@ -50,7 +51,10 @@ class VerbHandler:
         if not self.o.tags.get('pool'):
             pass
         if self.o.location is not None:
-            self.o.location = None
+            if hasattr(self.o, 'leave_location'):
+                self.o.leave_location()
+            else:
+                self.o.location = None
 
     def drop(self):
         """Implements the attempt to drop this object."""
@@ -87,15 +91,7 @@ class VerbHandler:
         if self.o == self.s:
             self.s.msg('You decide to follow your heart.')
             return
-        action = 'follow'
-        if self.o.attributes.has('followers') and self.o.db.followers:
-            if self.s in self.o.db.followers:
-                self.o.db.followers.remove(self.s)
-                action = 'stop following'
-            else:
-                self.o.db.followers.append(self.s)
-        else:
-            self.o.db.followers = [self.s]
+        action = 'follow' if GROUPS.follow(self.s, self.o) else 'stop following'
         color = 'g' if action == 'follow' else 'r'
         self.s.location.msg_contents('|%s%s|n decides to %s {follower}.'
                                      % (color, self.s.key, action), from_obj=self.s, mapping=dict(follower=self.o))
@@ -154,20 +150,7 @@ class VerbHandler:
         """Set riding agreement - subject rides object"""
         if self.o == self.s:
             return
-        action = 'ride'
-        if self.o.attributes.has('riders') and self.o.db.riders:
-            if self.s in self.o.db.riders:
-                self.o.db.riders.remove(self.s)
-                action = 'stop riding'
-            else:
-                self.o.db.riders.append(self.s)
-        else:
-            self.o.db.riders = [self.s]
-        # subject is/was riding self invalidate self.s riding anyone else in the room.
-        for each in self.s.location.contents:
-            if each == self.s or each == self.o or not each.db.riders or self.s not in each.db.riders:
-                continue
-            each.db.riders.remove(self.s)
+        action = 'ride' if GROUPS.ride(self.s, self.o) else 'stop riding'  # Also stops riding anything else.
         color = 'g' if action == 'ride' else 'r'
         self.s.location.msg_contents('|%s%s|n decides to %s {mount}.'
                                      % (color, self.s.key, action), from_obj=self.s, mapping=dict(mount=self.o))
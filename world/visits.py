@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Visit log
+
+Who has entered a tangible object, kept as one small attribute row per
+visitor in the 'visits' category: (visitor, last time, came from, count).
+An arrival rewrites only its visitor's row and the summary counters,
+so a busy room no longer re-saves every visitor it has ever had.
+
+Rows not updated within RETENTION are dropped every PRUNE_EVERY visits.
+The summary counters (visits, first time) keep counting regardless.
+Visitors kept in the old `hosted` attribute dict are moved into rows
+the first time the log is used.
+
+Set up on a typeclass as a lazy property, like the TraitHandler:
+
+    @lazy_property
+    def visits(self):
+        return VisitLog(self)
+"""
+import time
+
+CATEGORY = 'visits'  # Attribute category of visitor rows
+SUMMARY = 'visit summary'  # Attribute category of the summary counters
+RETENTION = 90 * 24 * 3600  # Seconds a visitor row is kept since its last visit
+PRUNE_EVERY = 100  # Visits between drops of rows older than the retention
+
+
+class VisitLog(object):
+    """Visitor rows and summary counters of one object."""
+
+    def __init__(self, obj):
+        self.obj = obj
+        if obj.attributes.has('hosted'):
+            self.migrate()
+
+    @staticmethod
+    def row_key(visitor):
+        return '#%i' % visitor.id
+
+    def record(self, visitor, source, now=None):
+        """
+        Log a visit of visitor coming from source.
+        Returns:
+            Time of visitor's previous visit, or now for a first visit.
+        """
+        now = int(now or time.time())
+        key = self.row_key(visitor)
+        row = self.obj.attributes.get(key, category=CATEGORY)
+        self.obj.attributes.add(key, (visitor, now, source, (row[3] if row else 0) + 1), category=CATEGORY)
+        visits = self.obj.attributes.get('visits', category=SUMMARY) or 0
+        self.obj.attributes.add('visits', visits + 1, category=SUMMARY)
+        if not visits:
+            self.obj.attributes.add('since', now, category=SUMMARY)
+        if visits % PRUNE_EVERY == PRUNE_EVERY - 1:
+            self.prune(now)
+        return row[1] if row else now
+
+    def rows(self):
+        """Every visitor row (visitor, last time, came from, count), latest first."""
+        rows = [attr.value for attr in self.obj.attributes.get(category=CATEGORY, return_obj=True,
+                                                                  return_list=True) if attr]
+        return sorted([row for row in rows if row[0]], key=lambda row: row[1], reverse=True)
+
+    def page(self, number, size=20):
+        """The visitor rows of page number (counting from 1), and the number of pages."""
+        rows = self.rows()
+        pages = max(1, (len(rows) + size - 1) // size)
+        number = min(max(1, number), pages)
+        return rows[(number - 1) * size:number * size], pages
+
+    def recent(self, count=20):
+        """The latest count visitors."""
+        return [row[0] for row in self.rows()[:count]]
+
+    def summary(self):
+        """(visits, visitors, since) counted for this object."""
+        return (self.obj.attributes.get('visits', category=SUMMARY) or 0,
+                len(self.obj.attributes.get(category=CATEGORY, return_list=True) or []),
+                self.obj.attributes.get('since', category=SUMMARY))
+
+    def prune(self, now=None):
+        """Drop rows whose last visit is older than the retention. Returns the number dropped."""
+        oldest = (now or time.time()) - RETENTION
+        dropped = 0
+        for attr in self.obj.attributes.get(category=CATEGORY, return_obj=True, return_list=True):
+            if attr and (not attr.value[0] or attr.value[1] < oldest):
+                self.obj.attributes.remove(attr.key, category=CATEGORY)
+                dropped += 1
+        return dropped
+
+    def migrate(self):
+        """Move the rows of the old hosted dict, keyed by visitor, into the log."""
+        hosted = self.obj.attributes.get('hosted') or {}
+        visits, since = 0, None
+        for visitor, (when, source, count) in hosted.items():
+            if visitor:
+                self.obj.attributes.add(self.row_key(visitor), (visitor, when, source, count), category=CATEGORY)
+                visits += count
+                since = min(since or when, when)
+        if visits:
+            self.obj.attributes.add('visits', visits, category=SUMMARY)
+            self.obj.attributes.add('since', since, category=SUMMARY)
+        self.obj.attributes.remove('hosted')
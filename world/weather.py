@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Weather
+
+Weather is shared by region: the rooms tagged with the same 'zone' (or
+'area' when they have no zone) have one weather state between them,
+and rooms with neither tag are each a region of their own. A region's
+state moves between the conditions in STATES, and when it changes the
+message is shown to every occupied room of the region in one pass. A
+room with its own `weather` attribute shows a message from that tuple
+in place of the region's.
+
+The scheduler holds one queue of regions ordered by when each is next
+due. A room joins its region when a character arrives in it, and rooms
+found empty when their region comes due are dropped, so only regions
+with occupied rooms are woken. Registering a room already in its region
+does nothing. A room given a different zone or area tag moves to its new
+region at once, by the tag signal connected at server start with
+`WEATHER.connect()`. When the queue is empty, the occupied rooms are queued from
+the presence index, which picks up rooms still occupied after a reload.
+
+The weather script (typeclasses.scripts.WeatherScript) calls `tick`
+every few seconds, and keeps each region's (state, message, time) in
+its `regions` attribute so weather carries over a restart. Weather
+tickers left over from before the scheduler are removed once at server
+start by `remove_tickers`.
+"""
+import heapq
+import random
+import time
+from world.presence import PRESENCE
+from world.routing import ZONE_CATEGORIES
+
+INTERVAL = (240, 600)  # Seconds between one region's updates, chosen at random in this range
+ODDS_ACTIVE, ODDS_IDLE = 0.15, 0.02  # Chance of a change when someone has, or has not, been active since the last
+
+STATES = {  # condition: (messages, {next condition: weight})
+    'clear': (("The clouds part, and light spills across the land.",
+               "A light breeze stirs, carrying the scent of wet earth.",
+               "The sky is clear and wide above you."),
+              {'clear': 4, 'cloudy': 3}),
+    'cloudy': (("Large clouds rush across the sky, throwing shadows over the world.",
+                "The sky darkens as grey clouds gather overhead.",
+                "You hear the distant howl of what sounds like some sort of dog or wolf."),
+               {'clear': 2, 'cloudy': 3, 'rain': 3}),
+    'rain': (("The rain coming down from the iron-grey sky intensifies.",
+              "A gust of wind throws the rain right in your face. Despite your cloak you shiver.",
+              "The rainfall eases a bit and the sky momentarily brightens.",
+              "For a moment it looks like the rain is slowing, then it begins anew with renewed force.",
+              "Large clouds rush across the sky, throwing their load of rain over the world."),
+             {'cloudy': 3, 'rain': 4, 'storm': 2}),
+    'storm': (("The rain pummels you with large, heavy drops. You hear the rumble of thunder in the distance.",
+               "The wind is picking up, howling around you, throwing water droplets in your face. It's cold.",
+               "Bright fingers of lightning flash over the sky, moments later followed by a deafening rumble.",
+               "It rains so hard you can hardly see your hand in front of you. You'll soon be drenched to the bone.",
+               "Lightning strikes in several thundering bolts, striking the trees in the forest to your west."),
+              {'rain': 3, 'storm': 2}),
+}
+START_STATE = 'rain'
+
+
+def region_of(room):
+    """Key of the weather region of room, such as 'zone:Forest', or 'room:123'."""
+    for category in ZONE_CATEGORIES:
+        keys = room.tags.get(category=category, return_list=True)
+        if keys:
+            return '%s:%s' % (category, keys[0])
+    return 'room:%s' % room.id
+
+
+class WeatherRegion(object):
+    """The weather state shared by the rooms of one region."""
+
+    def __init__(self, key, state=START_STATE, roll=0, since=0):
+        self.key = key
+        self.state = state if state in STATES else START_STATE
+        self.roll = roll  # Picks the message of the current state, or of a room's own weather tuple
+        self.since = since  # Time of the last change
+        self.rooms = set()
+
+    def message(self, room=None):
+        """The current weather message, as shown in room."""
+        messages = room and room.db.weather or STATES[self.state][0]
+        return messages[self.roll % len(messages)]
+
+    def advance(self, odds, now):
+        """Maybe move to a new condition or message. Returns True if the weather changed."""
+        if random.random() >= odds:
+            return False
+        transitions = STATES[self.state][1]
+        pick = random.uniform(0, sum(transitions.values()))
+        for state, weight in sorted(transitions.items()):
+            pick -= weight
+            if pick <= 0:
+                break
+        roll = random.randrange(1 << 16)
+        if (state, roll % len(STATES[state][0])) == (self.state, self.roll % len(STATES[self.state][0])):
+            return False  # ... only update on a new weather condition.
+        self.state, self.roll, self.since = state, roll, int(now)
+        return True
+
+    def show(self, rooms, now=None):
+        """Show the current weather in each of rooms."""
+        for room in rooms:
+            text = self.message(room)
+            room.msg_contents("|w%s|n" % text)
+            room.ndb.weather_last = text
+            room.ndb.weather_time = int(now or time.time())
+
+
+class WeatherScheduler(object):
+    """Weather regions in order of their next update."""
+
+    def __init__(self):
+        self.regions = {}  # region key: WeatherRegion
+        self.region_of = {}  # room: region key, for rooms in a queued region
+        self.queue = []  # Heap of (due time, region key)
+        self.due = {}  # region key: due time, for regions in the queue
+        self.changed = False  # True when region state has changed since last saved
+
+    def region(self, key):
+        """The region with key, created when missing."""
+        region = self.regions.get(key)
+        if region is None:
+            region = self.regions[key] = WeatherRegion(key)
+        return region
+
+    def register(self, room, now=None):
+        """Add room to its region and queue the region, unless already done."""
+        if room in self.region_of:
+            return False
+        key = self.region_of[room] = region_of(room)
+        self.region(key).rooms.add(room)
+        if key not in self.due:
+            self.schedule(key, now)
+        return True
+
+    def schedule(self, key, now=None):
+        """Queue region key for its next update."""
+        due = (now or time.time()) + random.randint(*INTERVAL)
+        self.due[key] = due
+        heapq.heappush(self.queue, (due, key))
+
+    def remove(self, room):
+        """Stop updating room."""
+        key = self.region_of.pop(room, None)
+        if key is not None:
+            self.regions[key].rooms.discard(room)
+
+    def retagged(self, sender, instance, action, **kwargs):
+        """Receiver for object tag changes: move a registered room whose zone or area changed to its new region."""
+        if action not in ('post_add', 'post_remove', 'post_clear') or instance not in self.region_of:
+            return
+        if region_of(instance) != self.region_of[instance]:
+            self.remove(instance)
+            self.register(instance)
+
+    def connect(self):
+        """Connect the receiver that hears rooms change zone or area."""
+        from django.db.models.signals import m2m_changed
+        from evennia.objects.models import ObjectDB
+        m2m_changed.connect(self.retagged, sender=ObjectDB.db_tags.through, dispatch_uid='weather_tags')
+
+    def show(self, room):
+        """Show room its region's current weather, as on first arrival."""
+        self.region(region_of(room)).show([room])
+
+    def register_occupied(self, now=None):
+        """Queue every occupied weather room, such as those still occupied after a reload."""
+        for location in set(character.location for character in PRESENCE.puppets()):
+            if location and location.tags.get('weather', category='flags'):
+                self.register(location, now)
+
+    def tick(self, now=None):
+        """Update every region now due that still has occupied rooms. Returns the number of regions updated."""
+        now = now or time.time()
+        if not self.queue:
+            self.register_occupied(now)
+        updated = 0
+        while self.queue and self.queue[0][0] <= now:
+            due, key = heapq.heappop(self.queue)
+            if self.due.get(key) != due:
+                continue  # Queued again since.
+            del self.due[key]
+            region = self.regions[key]
+            occupied = []
+            for room in list(region.rooms):
+                if PRESENCE.occupied(room):
+                    occupied.append(room)
+                else:  # Registered again on the next arrival.
+                    region.rooms.discard(room)
+                    self.region_of.pop(room, None)
+            if not occupied:
+                continue
+            active = any(PRESENCE.last_active(room) > region.since for room in occupied)
+            if region.advance(ODDS_ACTIVE if active else ODDS_IDLE, now):
+                region.show(occupied, now)
+                self.changed = True
+            updated += 1
+            self.schedule(key, now)
+        return updated
+
+    def save(self):
+        """Region states as {region key: (state, roll, since)}, for storing."""
+        self.changed = False
+        return dict((key, (region.state, region.roll, region.since)) for key, region in self.regions.items())
+
+    def load(self, data):
+        """Restore region states saved by `save`."""
+        for key, (state, roll, since) in (data or {}).items():
+            rooms = self.regions[key].rooms if key in self.regions else set()
+            self.regions[key] = WeatherRegion(key, state, roll, since)
+            self.regions[key].rooms = rooms
+
+    def clear(self):
+        """Forget every queued room and region."""
+        del self.queue[:]
+        self.due.clear()
+        self.region_of.clear()
+        self.regions.clear()
+
+
+def remove_tickers():
+    """
+    Remove the per-room weather tickers the scheduler replaces, and
+    report any room that had more than one to the MudInfo channel.
+    Returns:
+        The number of tickers removed.
+    """
+    from evennia import TICKER_HANDLER
+    from evennia.comms.models import ChannelDB
+    counts = {}
+    for tick in TICKER_HANDLER.all_display():
+        obj, method, interval, idstring, persistent = tick[0], tick[1], tick[3], tick[4], tick[5]
+        if not obj or method != 'update_weather':
+            continue
+        TICKER_HANDLER.remove(interval=interval, callback=getattr(obj, method), idstring=idstring,
+                              persistent=persistent)
+        counts[obj] = counts.get(obj, 0) + 1
+    extra = ['%s (#%s) had %i' % (obj.key, obj.id, count) for obj, count in counts.items() if count > 1]
+    channel = ChannelDB.objects.channel_search('MudInfo')
+    if extra and channel:
+        channel[0].msg('* Extra weather tickers removed * %s' % ', '.join(extra), keep_log=False)
+    return sum(counts.values())
+
+
+WEATHER = WeatherScheduler()